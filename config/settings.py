@@ -14,7 +14,16 @@ USER_PROFILE_FILE = os.path.join(DATA_DIR, "user_profile.json")
 KNOWLEDGE_MEMORY_FILE = os.path.join(DATA_DIR, "knowledge_memory.json")
 FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.json")
 STATS_FILE = os.path.join(DATA_DIR, "stats.json")
+PEDAGOGICAL_FEEDBACK_FILE = os.path.join(DATA_DIR, "pedagogical_feedback.json")
 USER_DATA_FILE = os.path.join(DATA_DIR, "user_data.json")
+DECOMPOSITION_CACHE_FILE = os.path.join(DATA_DIR, "decomposition_cache.json")
+
+# Corpus pédagogique des moteurs (un fichier JSON par matière)
+CORPUS_DIR = os.path.join(DATA_DIR, "corpus")
+LOCAL_SEARCH_INDEX_FILE = os.path.join(DATA_DIR, "local_search_index.json")
+
+# Seaux de jetons des API, partagés entre processus (fichier verrouillé)
+RATE_LIMIT_FILE = os.path.join(DATA_DIR, "rate_limits.json")
 
 # ========================================
 # CONFIGURATION API
@@ -46,8 +55,9 @@ DEFAULT_USER_PROFILE = {
     },
     "fatigue_sensitivity": 0.5,
     "web_enabled": False,
-    "preferred_hours": {},
+    "activity_week": {},
     "subject_preferences": {},
+    "duration_estimators": {},
     "total_tasks_completed": 0,
     "streak_days": 0,
     "last_session": None
@@ -64,9 +74,15 @@ DEFAULT_FEEDBACK = {
     },
     "pedagogical_feedback": [],
     "sessions": [],
+    "estimators": {},
     "last_session": None
 }
 
+DEFAULT_PEDAGOGICAL_FEEDBACK = {
+    "history": [],
+    "element_counts": {}
+}
+
 DEFAULT_STATS = {
     "total_sessions": 0,
     "total_tasks_decomposed": 0,
@@ -81,5 +97,34 @@ DEFAULT_STATS = {
 # ========================================
 API_TIMEOUT = 30  # secondes
 MAX_RETRIES = 3
+HTTP_POOL_SIZE = 10  # connexions keep-alive gardées ouvertes par hôte
+RETRY_BASE_DELAY = 1.0  # secondes : attente de base entre deux tentatives (doublée à chaque essai, avec jitter)
+RETRY_MAX_DELAY = 20.0  # secondes : attente maximale entre deux tentatives (Retry-After compris)
+CIRCUIT_FAILURE_THRESHOLD = 3  # appels en échec d'affilée avant de couper un endpoint
+CIRCUIT_COOLDOWN = 60  # secondes pendant lesquelles un endpoint coupé échoue immédiatement
+API_RATE_LIMIT_PER_MINUTE = 50  # appels Anthropic autorisés par minute (tous processus confondus)
+API_RATE_LIMIT_PER_DAY = 1000  # appels Anthropic autorisés par jour
+WEB_RATE_LIMIT_PER_MINUTE = 10  # requêtes web (Perplexity) autorisées par minute
+WEB_DAILY_LIMIT = 50  # requêtes web par jour : quota de WebGuard
+API_RATE_LIMIT_BURST = 5  # appels Anthropic partant d'affilée sans attendre (décompositions en lot)
+WEB_RATE_LIMIT_BURST = 3  # requêtes web partant d'affilée sans attendre
+RATE_LIMIT_WAIT = 30  # secondes : attente maximale d'un jeton avant de passer en offline
+BATCH_CONCURRENCY = 4  # décompositions menées en parallèle par decompose_many
+HEDGE_DEADLINE = 8  # secondes : au-delà, le plan de l'API ne remplace plus le plan offline
+# Un seul plan arborescent par tâche, décliné localement pour chaque spiciness
+# (une requête API par tâche au lieu d'une par spiciness). En contrepartie :
+# pas de streaming des étapes (l'arbre entier est attendu) et une seule entrée
+# de cache par tâche au lieu d'une par spiciness. Désactivé par défaut.
+HIERARCHICAL_DECOMPOSITION = False
+SCHEDULER_SESSION_MINUTES = 60  # durée d'une séance de travail planifiée (suite de pomodoros)
+SCHEDULER_HORIZON_DAYS = 120  # au-delà, le travail restant est signalé comme non planifié
+SCHEDULER_DEFAULT_DEADLINE_DAYS = 7  # échéance d'une tâche sans contrainte de temps détectée
+OFFLINE_SEARCH_RESULTS = 5  # éléments du corpus ajoutés par la recherche locale hors ligne
 MAX_TASK_HISTORY = 100
 MAX_FEEDBACK_HISTORY = 200
+FEEDBACK_DEDUP_WINDOW = 300  # secondes : un feedback répété sur la même tâche remplace le précédent
+EWMA_ALPHA = 0.2  # poids d'une nouvelle observation dans les estimateurs en ligne
+ACTIVITY_DECAY = 1.0  # décroissance de l'histogramme d'activité à chaque session (1.0 = aucune)
+ACTIVITY_TOP_K = 10  # créneaux les plus productifs maintenus en continu
+DECOMPOSITION_CACHE_MEMORY_SIZE = 128  # décompositions gardées en mémoire (LRU)
+DECOMPOSITION_CACHE_MAX_ENTRIES = 1000  # décompositions gardées sur disque
@@ -6,3 +6,4 @@ from .feedback_engine import FeedbackEngine
 from .pedagogical_feedback import PedagogicalFeedback
 from .knowledge_memory import KnowledgeMemory
 from .decision_engine import DecisionEngine
+from .persistence import transaction
@@ -44,10 +44,14 @@ class DecisionEngine:
     ):
         """
         Args:
-            user_personalization: Instance de UserPersonalization
+            user_personalization: Instance de UserPersonalization (défaut: instance partagée)
             knowledge_memory: Instance de KnowledgeMemory
             web_guard: Instance de WebGuard
         """
+        if user_personalization is None:
+            from core.personalization import UserPersonalization
+            user_personalization = UserPersonalization.shared()
+
         self.user_profile = user_personalization
         self.knowledge_memory = knowledge_memory
         self.web_guard = web_guard
@@ -0,0 +1,203 @@
+"""
+Cache de décomposition - Évite de redemander à l'IA un plan déjà obtenu
+Deux niveaux : LRU en mémoire (lecture immédiate) + fichier JSON sur disque.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config.settings import (
+    DECOMPOSITION_CACHE_FILE,
+    DECOMPOSITION_CACHE_MEMORY_SIZE,
+    DECOMPOSITION_CACHE_MAX_ENTRIES
+)
+from core.persistence import atomic_write_json, schedule_save
+
+
+class DecompositionCache:
+    """
+    Cache des sous-tâches parsées, indexé par (tâche normalisée, spiciness,
+    tier, matière, empreinte du contexte web).
+
+    Les sous-tâches sont stockées sans identifiant : le planificateur en
+    attribue de nouveaux à chaque lecture, deux plans ne partagent donc
+    jamais les mêmes ids.
+
+    Structure du fichier :
+    {
+        "entries": {
+            "<clé sha256>": {"subtasks": [{"title", "category", ...}]}
+        }
+    }
+    """
+
+    _shared_instances: Dict[str, "DecompositionCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_file: str = None,
+        memory_size: int = DECOMPOSITION_CACHE_MEMORY_SIZE,
+        max_entries: int = DECOMPOSITION_CACHE_MAX_ENTRIES
+    ):
+        self.cache_file = cache_file or DECOMPOSITION_CACHE_FILE
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Sérialise les écritures : un instantané plus ancien ne remplace jamais un plus récent
+        self._write_lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        # Entrées du disque, chargées au premier défaut de cache mémoire
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def shared(cls, cache_file: str = None) -> "DecompositionCache":
+        """Retourne l'instance partagée pour un fichier de cache"""
+        path = os.path.abspath(cache_file or DECOMPOSITION_CACHE_FILE)
+        with cls._shared_lock:
+            instance = cls._shared_instances.get(path)
+            if instance is None:
+                instance = cls(path)
+                cls._shared_instances[path] = instance
+            return instance
+
+    # ========================================
+    # CLÉS
+    # ========================================
+
+    @staticmethod
+    def normalize_task(task: str) -> str:
+        """Normalise une consigne (casse, espaces, forme Unicode)"""
+        task = unicodedata.normalize("NFC", task or "").lower()
+        return re.sub(r'\s+', ' ', task).strip()
+
+    @staticmethod
+    def make_key(
+        task: str,
+        spiciness: int,
+        tier: str,
+        subject: Optional[str] = None,
+        web_context: Optional[Dict] = None
+    ) -> str:
+        """
+        Construit la clé de cache d'une décomposition
+
+        Args:
+            task: Consigne brute
+            spiciness: Niveau de détail (1-5)
+            tier: Tier éducatif (college/lycee/universite)
+            subject: Matière détectée
+            web_context: Contexte web injecté dans le prompt
+        """
+        web_hash = ""
+        if web_context:
+            web_json = json.dumps(web_context, sort_keys=True, ensure_ascii=False, default=str)
+            web_hash = hashlib.sha256(web_json.encode("utf-8")).hexdigest()
+
+        parts = [
+            DecompositionCache.normalize_task(task),
+            str(spiciness),
+            tier or "",
+            subject or "",
+            web_hash
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    # ========================================
+    # LECTURE / ÉCRITURE
+    # ========================================
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Retourne une copie des sous-tâches en cache (sans ids), ou None
+
+        Args:
+            key: Clé construite par make_key()
+        """
+        with self._lock:
+            subtasks = self._memory.get(key)
+            if subtasks is not None:
+                self._memory.move_to_end(key)
+            else:
+                entry = self._load_entries().get(key)
+                if entry is None:
+                    return None
+                subtasks = entry["subtasks"]
+                self._remember(key, subtasks)
+
+        return [dict(subtask) for subtask in subtasks]
+
+    def put(self, key: str, subtasks: List[Dict]):
+        """
+        Enregistre les sous-tâches d'une décomposition
+
+        Args:
+            key: Clé construite par make_key()
+            subtasks: Sous-tâches parsées (les ids sont retirés)
+        """
+        stored = [
+            {field: value for field, value in subtask.items() if field != "id"}
+            for subtask in subtasks
+        ]
+
+        with self._lock:
+            entries = self._load_entries()
+            entries.pop(key, None)
+            entries[key] = {"subtasks": stored}
+
+            # Les entrées les plus anciennes sortent en premier
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+
+            self._remember(key, stored)
+
+        self.save_cache()
+
+    def clear(self):
+        """Vide le cache (mémoire et disque)"""
+        with self._lock:
+            self._memory.clear()
+            self._entries = {}
+        self.save_cache()
+
+    def _remember(self, key: str, subtasks: List[Dict]):
+        """Place une entrée en tête du LRU mémoire (verrou déjà pris)"""
+        self._memory[key] = subtasks
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # ========================================
+    # PERSISTANCE
+    # ========================================
+
+    def _load_entries(self) -> Dict[str, Dict]:
+        """Charge les entrées du disque au premier accès (verrou déjà pris)"""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                if os.path.exists(self.cache_file):
+                    with open(self.cache_file, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f).get("entries", {})
+            except Exception as e:
+                print(f"⚠️ Erreur chargement cache de décomposition: {e}")
+        return self._entries
+
+    def save_cache(self):
+        """Sauvegarde le cache (différée si une transaction est ouverte)"""
+        schedule_save(self.cache_file, self._write_cache)
+
+    def _write_cache(self):
+        """Écrit le cache sur disque"""
+        with self._write_lock:
+            with self._lock:
+                data = {"entries": dict(self._load_entries())}
+            try:
+                atomic_write_json(self.cache_file, data)
+            except Exception as e:
+                print(f"⚠️ Erreur sauvegarde cache de décomposition: {e}")
@@ -0,0 +1,140 @@
+"""
+Estimateurs en ligne - Moyennes exponentielles et classements incrémentaux
+Chaque estimateur tient en quelques flottants sérialisables en JSON.
+"""
+import heapq
+from typing import Dict, Iterable, List, Optional
+
+from config.settings import EWMA_ALPHA
+
+
+def ewma_update(state: Optional[Dict], value: float, alpha: float = EWMA_ALPHA) -> Dict:
+    """
+    Met à jour une moyenne exponentielle {"mean", "count"}
+
+    Args:
+        state: État courant (None ou vide pour un nouvel estimateur)
+        value: Nouvelle observation
+        alpha: Poids de la nouvelle observation (0-1)
+
+    Returns:
+        L'état mis à jour (modifié en place s'il existait)
+    """
+    if not state or not state.get("count"):
+        return {"mean": float(value), "count": 1}
+
+    state["mean"] += alpha * (value - state["mean"])
+    state["count"] += 1
+    return state
+
+
+def ewma_merge(
+    base: Optional[Dict],
+    local: Dict,
+    other: Optional[Dict],
+    alpha: float = EWMA_ALPHA
+) -> Dict:
+    """
+    Fusionne deux évolutions concurrentes d'une moyenne exponentielle
+
+    Rejoue sur `other` les observations ajoutées localement depuis `base`
+    (état commun) : la contribution locale est décalée de l'écart entre les
+    deux points de départ, atténué par les n mises à jour locales.
+
+    Args:
+        base: État commun avant les deux évolutions (None si l'estimateur n'existait pas)
+        local: État obtenu localement depuis base
+        other: État obtenu ailleurs (autre processus) depuis base
+
+    Returns:
+        Un nouvel état {"mean", "count"}
+    """
+    if not other or not other.get("count"):
+        return dict(local)
+
+    if not base or not base.get("count"):
+        # Pas d'état commun : moyenne pondérée par le nombre d'observations
+        count = local["count"] + other["count"]
+        mean = (local["mean"] * local["count"] + other["mean"] * other["count"]) / count
+        return {"mean": mean, "count": count}
+
+    added = max(0, local["count"] - base["count"])
+    mean = local["mean"] + (1 - alpha) ** added * (other["mean"] - base["mean"])
+    return {"mean": mean, "count": other["count"] + added}
+
+
+def ewma_frequency_update(
+    state: Optional[Dict],
+    outcome: str,
+    outcomes: Iterable[str],
+    alpha: float = EWMA_ALPHA
+) -> Dict:
+    """
+    Met à jour les fréquences exponentielles d'un ensemble fini de résultats
+
+    Args:
+        state: {résultat: fréquence, ..., "count": n} ou None
+        outcome: Résultat observé
+        outcomes: Ensemble des résultats possibles
+        alpha: Poids de la nouvelle observation (0-1)
+
+    Returns:
+        L'état mis à jour, dont les fréquences somment à 1
+    """
+    if not state or not state.get("count"):
+        state = {key: 0.0 for key in outcomes}
+        state[outcome] = 1.0
+        state["count"] = 1
+        return state
+
+    for key in outcomes:
+        target = 1.0 if key == outcome else 0.0
+        state[key] = state.get(key, 0.0) + alpha * (target - state.get(key, 0.0))
+    state["count"] += 1
+    return state
+
+
+class TopK:
+    """
+    Indices des k plus grandes valeurs d'un tableau de compteurs croissants
+
+    Le tableau est partagé (pas copié) : après avoir augmenté values[i],
+    appeler bump(i) maintient le classement en O(k), sans retrier le tableau.
+    """
+
+    def __init__(self, values: List[float], k: int):
+        self.values = values
+        self.k = k
+        self.indices = heapq.nlargest(
+            k,
+            (i for i, value in enumerate(values) if value > 0),
+            key=values.__getitem__
+        )
+
+    def bump(self, index: int):
+        """Reclasse un indice dont la valeur vient d'augmenter"""
+        values = self.values
+        indices = self.indices
+
+        if index in indices:
+            indices.remove(index)
+        elif len(indices) >= self.k:
+            if values[index] <= values[indices[-1]]:
+                return
+            indices.pop()
+
+        # Insertion à sa place (la liste reste triée par valeur décroissante)
+        position = len(indices)
+        while position > 0 and values[indices[position - 1]] < values[index]:
+            position -= 1
+        indices.insert(position, index)
+
+    def top(self, n: int) -> List[int]:
+        """Retourne les n meilleurs indices (O(n) si n <= k)"""
+        if n <= self.k:
+            return self.indices[:n]
+        return heapq.nlargest(
+            n,
+            (i for i, value in enumerate(self.values) if value > 0),
+            key=self.values.__getitem__
+        )
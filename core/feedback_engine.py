@@ -1,12 +1,15 @@
 """
 Moteur de feedback - Apprentissage sur la forme (spiciness, durée, difficulté)
 """
+import copy
 import json
 import os
 from typing import Dict, List, Optional
 from datetime import datetime
 
-from config.settings import FEEDBACK_FILE, DEFAULT_FEEDBACK, DATA_DIR
+from config.settings import FEEDBACK_FILE, DEFAULT_FEEDBACK, DATA_DIR, FEEDBACK_DEDUP_WINDOW
+from core.estimators import ewma_update, ewma_frequency_update
+from core.persistence import atomic_write_json, schedule_save
 
 
 class FeedbackEngine:
@@ -16,11 +19,29 @@ class FeedbackEngine:
     - Durée des tâches
     - Difficulté perçue
     - Satisfaction générale
+
+    En plus de l'historique brut, des estimateurs exponentiels (quelques
+    flottants) sont tenus à jour à chaque enregistrement pour que les
+    suggestions d'adaptation ne relisent jamais l'historique.
     """
 
+    SPICINESS_OUTCOMES = ("too_detailed", "just_right", "not_enough")
+    GLOBAL_KEY = "_global"
+
+    # Identifiants envoyés par le client quand la tâche n'en a pas : jamais dédupliqués
+    PLACEHOLDER_TASK_IDS = {"unknown", "undefined", "null", "none"}
+
+    # Résultats de _upsert_entry
+    ADDED = "added"
+    REPLACED = "replaced"
+
     def __init__(self, feedback_file: str = None):
         self.feedback_file = feedback_file or FEEDBACK_FILE
         self.feedback_data = self.load_feedback()
+        self._entry_index = {}
+        self._rebuild_index()
+        if not self.feedback_data.get("estimators"):
+            self._seed_estimators()
 
     def load_feedback(self) -> Dict:
         """Charge l'historique de feedback"""
@@ -30,18 +51,36 @@ class FeedbackEngine:
             if os.path.exists(self.feedback_file):
                 with open(self.feedback_file, 'r', encoding='utf-8') as f:
                     loaded = json.load(f)
-                    return {**DEFAULT_FEEDBACK, **loaded}
+                    data = {**copy.deepcopy(DEFAULT_FEEDBACK), **loaded}
+                    self._drop_invalid_entries(data)
+                    return data
         except Exception as e:
             print(f"⚠️ Erreur chargement feedback: {e}")
 
-        return DEFAULT_FEEDBACK.copy()
+        return copy.deepcopy(DEFAULT_FEEDBACK)
+
+    @staticmethod
+    def _drop_invalid_entries(data: Dict):
+        """
+        Écarte à la lecture les durées nulles enregistrées avant leur filtrage
+        (minuteur jamais lancé, voir record_duration_feedback)
+        """
+        form_feedback = data.get("form_feedback", {})
+        durations = form_feedback.get("duration")
+        if durations:
+            form_feedback["duration"] = [
+                entry for entry in durations
+                if (entry.get("actual_time") or 0) > 0
+            ]
 
     def save_feedback(self):
-        """Sauvegarde l'historique de feedback"""
+        """Sauvegarde l'historique de feedback (différée si une transaction est ouverte)"""
+        schedule_save(self.feedback_file, self._write_feedback)
+
+    def _write_feedback(self):
+        """Écrit l'historique de feedback sur disque"""
         try:
-            os.makedirs(os.path.dirname(self.feedback_file), exist_ok=True)
-            with open(self.feedback_file, 'w', encoding='utf-8') as f:
-                json.dump(self.feedback_data, f, indent=2, ensure_ascii=False)
+            atomic_write_json(self.feedback_file, self.feedback_data)
         except Exception as e:
             print(f"⚠️ Erreur sauvegarde feedback: {e}")
 
@@ -74,16 +113,19 @@ class FeedbackEngine:
             "timestamp": datetime.now().isoformat()
         }
 
-        self.feedback_data["form_feedback"]["spiciness"].append(entry)
-        self._limit_history()
-        self.save_feedback()
+        status = self._upsert_entry(entry)
+        if status == self.ADDED:
+            self._update_spiciness_estimator(feedback)
+        if status:
+            self.save_feedback()
 
     def record_duration_feedback(
         self,
         task_id: str,
         estimated_time: int,
         actual_time: int,
-        feedback: str = None  # "too_long", "accurate", "too_short"
+        feedback: str = None,  # "too_long", "accurate", "too_short"
+        category: str = None
     ):
         """
         Enregistre le feedback sur la durée
@@ -91,9 +133,14 @@ class FeedbackEngine:
         Args:
             task_id: ID de la tâche
             estimated_time: Temps estimé en minutes
-            actual_time: Temps réel en minutes
+            actual_time: Temps réel en minutes (ignoré si nul)
             feedback: Feedback explicite ou auto-calculé
+            category: Catégorie de la tâche (optionnel, affine l'estimateur)
         """
+        # Une durée nulle vient d'un minuteur jamais lancé : ce n'est pas un feedback
+        if actual_time is None or actual_time <= 0:
+            return
+
         # Auto-détection si pas de feedback explicite
         if feedback is None:
             ratio = actual_time / estimated_time if estimated_time > 0 else 1
@@ -111,12 +158,15 @@ class FeedbackEngine:
             "actual_time": actual_time,
             "feedback": feedback,
             "efficiency": estimated_time / actual_time if actual_time > 0 else 1.0,
+            "category": category,
             "timestamp": datetime.now().isoformat()
         }
 
-        self.feedback_data["form_feedback"]["duration"].append(entry)
-        self._limit_history()
-        self.save_feedback()
+        status = self._upsert_entry(entry)
+        if status == self.ADDED:
+            self._update_duration_estimator(entry["efficiency"], category)
+        if status:
+            self.save_feedback()
 
     def record_difficulty_feedback(
         self,
@@ -143,9 +193,8 @@ class FeedbackEngine:
             "timestamp": datetime.now().isoformat()
         }
 
-        self.feedback_data["form_feedback"]["difficulty"].append(entry)
-        self._limit_history()
-        self.save_feedback()
+        if self._upsert_entry(entry):
+            self.save_feedback()
 
     def record_satisfaction_feedback(
         self,
@@ -171,8 +220,169 @@ class FeedbackEngine:
 
         self.feedback_data["sessions"].append(entry)
         self._limit_history()
+        self._update_satisfaction_estimator(entry["satisfaction"])
         self.save_feedback()
 
+    def _upsert_entry(self, entry: Dict) -> Optional[str]:
+        """
+        Ajoute une entrée de feedback de forme, ou remplace celle de la même
+        tâche (même type) si elle a été enregistrée dans la fenêtre de déduplication
+
+        Returns:
+            ADDED pour une nouvelle observation (à compter dans les estimateurs),
+            REPLACED pour une correction d'une entrée déjà comptée, None si rien
+            n'a changé (pas de sauvegarde)
+        """
+        feedback_type = entry["type"]
+        key = self._dedup_key(feedback_type, entry.get("task_id"))
+        existing = self._entry_index.get(key) if key else None
+
+        if existing is not None and self._is_within_dedup_window(existing, entry):
+            if all(existing.get(k) == v for k, v in entry.items() if k != "timestamp"):
+                return None  # Doublon exact : rien à réécrire
+            existing.update(entry)
+            return self.REPLACED
+
+        self.feedback_data["form_feedback"].setdefault(feedback_type, []).append(entry)
+        if key:
+            self._entry_index[key] = entry
+        self._limit_history()
+        return self.ADDED
+
+    @classmethod
+    def _dedup_key(cls, feedback_type: str, task_id: Optional[str]) -> Optional[tuple]:
+        """Clé de déduplication, ou None pour un id absent ou factice ("unknown")"""
+        if not task_id or str(task_id).strip().lower() in cls.PLACEHOLDER_TASK_IDS:
+            return None
+        return (feedback_type, task_id)
+
+    @staticmethod
+    def _is_within_dedup_window(existing: Dict, entry: Dict) -> bool:
+        """Vérifie si deux entrées sont assez proches dans le temps pour être fusionnées"""
+        try:
+            previous = datetime.fromisoformat(existing["timestamp"])
+            current = datetime.fromisoformat(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return abs((current - previous).total_seconds()) <= FEEDBACK_DEDUP_WINDOW
+
+    def _rebuild_index(self):
+        """Reconstruit l'index (type, task_id) -> entrée la plus récente"""
+        self._entry_index = {}
+        for feedback_type, entries in self.feedback_data.get("form_feedback", {}).items():
+            for entry in entries:
+                key = self._dedup_key(feedback_type, entry.get("task_id"))
+                if key:
+                    self._entry_index[key] = entry
+
+    # ========================================
+    # ESTIMATEURS EN LIGNE
+    # ========================================
+
+    def _update_spiciness_estimator(self, feedback: str):
+        """Met à jour les fréquences exponentielles des retours de spiciness"""
+        if feedback not in self.SPICINESS_OUTCOMES:
+            return
+        estimators = self.feedback_data.setdefault("estimators", {})
+        estimators["spiciness"] = ewma_frequency_update(
+            estimators.get("spiciness"), feedback, self.SPICINESS_OUTCOMES
+        )
+
+    def _update_duration_estimator(self, efficiency: float, category: str = None):
+        """Met à jour l'efficacité moyenne globale et par catégorie"""
+        estimators = self.feedback_data.setdefault("estimators", {})
+        by_category = estimators.setdefault("duration_efficiency", {})
+
+        by_category[self.GLOBAL_KEY] = ewma_update(by_category.get(self.GLOBAL_KEY), efficiency)
+        if category:
+            by_category[category] = ewma_update(by_category.get(category), efficiency)
+
+    def _update_satisfaction_estimator(self, satisfaction: int):
+        """Met à jour la satisfaction moyenne"""
+        estimators = self.feedback_data.setdefault("estimators", {})
+        estimators["satisfaction"] = ewma_update(estimators.get("satisfaction"), satisfaction)
+
+    def _seed_estimators(self):
+        """Initialise les estimateurs à partir d'un historique existant (migration)"""
+        form_feedback = self.feedback_data.get("form_feedback", {})
+
+        for f in form_feedback.get("spiciness", []):
+            self._update_spiciness_estimator(f.get("feedback"))
+
+        for f in form_feedback.get("duration", []):
+            self._update_duration_estimator(f.get("efficiency", 1.0), f.get("category"))
+
+        for f in self.feedback_data.get("sessions", []):
+            if f.get("type") == "satisfaction":
+                self._update_satisfaction_estimator(f["satisfaction"])
+
+    def get_spiciness_estimate(self) -> Dict:
+        """
+        Tendance récente du feedback de spiciness (pondération exponentielle)
+
+        Returns:
+            Dict au même format que analyze_spiciness_trends
+        """
+        state = self.feedback_data.get("estimators", {}).get("spiciness")
+        if not state or not state.get("count"):
+            return {"adjustment": 0, "confidence": 0, "reason": "Pas assez de données"}
+
+        too_detailed = state.get("too_detailed", 0.0)
+        not_enough = state.get("not_enough", 0.0)
+        just_right = state.get("just_right", 0.0)
+
+        if too_detailed > not_enough and too_detailed > just_right:
+            adjustment = -1
+            reason = f"Trop détaillé dans {too_detailed:.0%} des retours récents"
+        elif not_enough > too_detailed and not_enough > just_right:
+            adjustment = +1
+            reason = f"Pas assez détaillé dans {not_enough:.0%} des retours récents"
+        else:
+            adjustment = 0
+            reason = f"Niveau adapté dans {just_right:.0%} des retours récents"
+
+        return {
+            "adjustment": adjustment,
+            "confidence": round(max(too_detailed, not_enough, just_right), 2),
+            "reason": reason,
+            "stats": {
+                "too_detailed": round(too_detailed, 2),
+                "just_right": round(just_right, 2),
+                "not_enough": round(not_enough, 2)
+            }
+        }
+
+    def get_duration_estimate(self, category: str = None) -> Dict:
+        """
+        Efficacité récente des estimations de temps (pondération exponentielle)
+
+        Args:
+            category: Catégorie de tâche (None = toutes catégories)
+
+        Returns:
+            Dict avec efficacité moyenne, biais et besoin d'ajustement
+        """
+        by_category = self.feedback_data.get("estimators", {}).get("duration_efficiency", {})
+        state = by_category.get(category or self.GLOBAL_KEY)
+
+        if not state or not state.get("count"):
+            return {"avg_efficiency": 1.0, "needs_adjustment": False, "bias": "accurate", "count": 0}
+
+        avg_efficiency = state["mean"]
+        return {
+            "avg_efficiency": round(avg_efficiency, 2),
+            "needs_adjustment": abs(avg_efficiency - 1.0) > 0.2,
+            "bias": "underestimate" if avg_efficiency < 0.8 else "overestimate" if avg_efficiency > 1.2 else "accurate",
+            "count": state["count"]
+        }
+
+    def get_satisfaction_estimate(self) -> float:
+        """Satisfaction récente (pondération exponentielle), 3.0 si inconnue"""
+        state = self.feedback_data.get("estimators", {}).get("satisfaction")
+        if not state or not state.get("count"):
+            return 3.0
+        return state["mean"]
+
     # ========================================
     # ANALYSE DU FEEDBACK
     # ========================================
@@ -306,7 +516,7 @@ class FeedbackEngine:
         suggestions = []
 
         # Analyse du spiciness
-        spiciness_analysis = self.analyze_spiciness_trends()
+        spiciness_analysis = self.get_spiciness_estimate()
         if spiciness_analysis["adjustment"] != 0 and spiciness_analysis["confidence"] > 0.5:
             current = user_profile.preferred_spiciness
             new = max(1, min(5, current + spiciness_analysis["adjustment"]))
@@ -319,18 +529,24 @@ class FeedbackEngine:
             })
 
         # Analyse de la durée
-        duration_analysis = self.analyze_duration_accuracy()
+        duration_analysis = self.get_duration_estimate()
         if duration_analysis["needs_adjustment"]:
+            by_category = self.feedback_data.get("estimators", {}).get("duration_efficiency", {})
+            categories = [
+                category for category in by_category
+                if category != self.GLOBAL_KEY and self.get_duration_estimate(category)["needs_adjustment"]
+            ]
             suggestions.append({
                 "type": "duration_estimation",
                 "priority": "medium",
                 "bias": duration_analysis["bias"],
                 "avg_efficiency": duration_analysis["avg_efficiency"],
+                "categories": categories,
                 "reason": f"Les estimations sont souvent {duration_analysis['bias']}"
             })
 
         # Satisfaction
-        avg_satisfaction = self.get_average_satisfaction()
+        avg_satisfaction = self.get_satisfaction_estimate()
         if avg_satisfaction < 2.5:
             suggestions.append({
                 "type": "general",
@@ -343,9 +559,14 @@ class FeedbackEngine:
     def _limit_history(self, max_entries: int = 200):
         """Limite la taille de l'historique"""
         form_feedback = self.feedback_data.get("form_feedback", {})
+        trimmed = False
         for key in ["spiciness", "duration", "difficulty"]:
             if key in form_feedback and len(form_feedback[key]) > max_entries:
                 form_feedback[key] = form_feedback[key][-max_entries:]
+                trimmed = True
+
+        if trimmed:
+            self._rebuild_index()
 
         if len(self.feedback_data.get("sessions", [])) > max_entries:
             self.feedback_data["sessions"] = self.feedback_data["sessions"][-max_entries:]
@@ -4,10 +4,11 @@ Structure: {subject: {topic: {missing_often, priority, times_flagged}}}
 """
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from config.settings import KNOWLEDGE_MEMORY_FILE, DEFAULT_KNOWLEDGE_MEMORY, DATA_DIR
+from core.persistence import atomic_write_json, schedule_save
 
 
 class KnowledgeMemory:
@@ -56,11 +57,13 @@ class KnowledgeMemory:
         return DEFAULT_KNOWLEDGE_MEMORY.copy()
 
     def save_memory(self):
-        """Sauvegarde la mémoire de savoir"""
+        """Sauvegarde la mémoire de savoir (différée si une transaction est ouverte)"""
+        schedule_save(self.memory_file, self._write_memory)
+
+    def _write_memory(self):
+        """Écrit la mémoire de savoir sur disque"""
         try:
-            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memory, f, indent=2, ensure_ascii=False)
+            atomic_write_json(self.memory_file, self.memory)
         except Exception as e:
             print(f"⚠️ Erreur sauvegarde mémoire: {e}")
 
@@ -82,8 +85,47 @@ class KnowledgeMemory:
             topic: Thème spécifique (ex: "premiere_guerre_mondiale")
             element_type: Type d'élément manquant
         """
+        if self._apply_missing_element(subject, topic, element_type):
+            self.save_memory()
+
+    def record_multiple_missing(
+        self,
+        subject: str,
+        topic: str,
+        elements: List[str]
+    ):
+        """Enregistre plusieurs éléments manquants en une fois (une seule sauvegarde)"""
+        changed = False
+        for element in elements:
+            changed = self._apply_missing_element(subject, topic, element) or changed
+
+        if changed:
+            self.save_memory()
+
+    def record_missing_batch(self, increments: Dict[Tuple[str, str], Dict[str, int]]):
+        """
+        Applique un lot de signalements agrégés, avec une seule sauvegarde
+
+        Args:
+            increments: {(matière, thème): {type d'élément: nombre de signalements}}
+        """
+        changed = False
+        for (subject, topic), counts in increments.items():
+            for element_type, count in counts.items():
+                changed = self._apply_missing_element(subject, topic, element_type, count) or changed
+
+        if changed:
+            self.save_memory()
+
+    def _apply_missing_element(self, subject: str, topic: str, element_type: str, count: int = 1) -> bool:
+        """
+        Applique un (ou plusieurs) signalement(s) en mémoire, sans sauvegarder
+
+        Returns:
+            True si la mémoire a été modifiée
+        """
         if not subject:
-            return
+            return False
 
         # Normaliser les clés
         subject = self._normalize_key(subject)
@@ -108,7 +150,7 @@ class KnowledgeMemory:
             topic_data["missing_often"].append(element_type)
 
         # Incrémenter le compteur
-        topic_data["times_flagged"] += 1
+        topic_data["times_flagged"] += count
 
         # Mettre à jour la priorité
         topic_data["priority"] = self._calculate_priority(topic_data["times_flagged"])
@@ -116,17 +158,7 @@ class KnowledgeMemory:
         # Mettre à jour le timestamp
         topic_data["last_updated"] = datetime.now().isoformat()
 
-        self.save_memory()
-
-    def record_multiple_missing(
-        self,
-        subject: str,
-        topic: str,
-        elements: List[str]
-    ):
-        """Enregistre plusieurs éléments manquants en une fois"""
-        for element in elements:
-            self.record_missing_element(subject, topic, element)
+        return True
 
     # ========================================
     # RÉCUPÉRATION DES DONNÉES
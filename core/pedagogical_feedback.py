@@ -2,13 +2,18 @@
 Feedback pédagogique - Analyse des critiques sur le CONTENU
 Transforme "il manque les dates" en données structurées
 """
+import copy
 import json
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Pattern, Tuple, Union
 from datetime import datetime
 
-from config.settings import DATA_DIR
+from config.settings import (
+    DATA_DIR, PEDAGOGICAL_FEEDBACK_FILE, DEFAULT_PEDAGOGICAL_FEEDBACK, MAX_FEEDBACK_HISTORY
+)
+from core.persistence import atomic_write_json, schedule_save
 
 
 class PedagogicalFeedback:
@@ -72,13 +77,107 @@ class PedagogicalFeedback:
         r"mal expliqué", r"difficile à comprendre", r"flou"
     ]
 
-    def __init__(self, knowledge_memory=None):
+    # Mots indiquant le sentiment général
+    POSITIVE_WORDS = ["bien", "super", "parfait", "merci", "top", "génial", "utile"]
+    NEGATIVE_WORDS = ["nul", "mauvais", "inutile", "horrible", "décevant", "frustrant"]
+
+    # Tous les motifs compilés en une seule expression (voir _get_scanner)
+    _scanner = None
+
+    def __init__(self, knowledge_memory=None, history_file: str = None):
         """
         Args:
             knowledge_memory: Instance de KnowledgeMemory pour mise à jour
+            history_file: Fichier d'historique (défaut: PEDAGOGICAL_FEEDBACK_FILE)
+
+        L'historique est persisté, borné à MAX_FEEDBACK_HISTORY entrées et
+        indexé par (matière, thème) : element_counts[matière][thème][élément]
+        est tenu à jour à chaque ajout et à chaque éviction.
         """
         self.knowledge_memory = knowledge_memory
-        self.feedback_history = []
+        self.history_file = history_file or PEDAGOGICAL_FEEDBACK_FILE
+        self.history_data = self.load_history()
+        self.feedback_history = self.history_data["history"]
+        self.element_counts = self.history_data["element_counts"]
+
+    # ========================================
+    # PERSISTANCE ET INDEX
+    # ========================================
+
+    def load_history(self) -> Dict:
+        """Charge l'historique de feedback pédagogique"""
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    data = {**copy.deepcopy(DEFAULT_PEDAGOGICAL_FEEDBACK), **json.load(f)}
+                    if data["history"] and not data["element_counts"]:
+                        data["element_counts"] = self._build_element_counts(data["history"])
+                    return data
+        except Exception as e:
+            print(f"⚠️ Erreur chargement feedback pédagogique: {e}")
+
+        return copy.deepcopy(DEFAULT_PEDAGOGICAL_FEEDBACK)
+
+    def save_history(self):
+        """Sauvegarde l'historique (différée si une transaction est ouverte)"""
+        schedule_save(self.history_file, self._write_history)
+
+    def _write_history(self):
+        """Écrit l'historique sur disque"""
+        try:
+            atomic_write_json(self.history_file, self.history_data)
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde feedback pédagogique: {e}")
+
+    def _record_history(self, parsed_feedback: Dict):
+        """Ajoute une entrée à l'historique borné et met à jour l'index"""
+        self._record_history_batch([parsed_feedback])
+
+    def _record_history_batch(self, parsed_feedbacks: List[Dict]):
+        """Ajoute plusieurs entrées à l'historique borné (une seule sauvegarde)"""
+        for parsed_feedback in parsed_feedbacks:
+            self.feedback_history.append(parsed_feedback)
+            self._count_elements(parsed_feedback, +1)
+
+        overflow = len(self.feedback_history) - MAX_FEEDBACK_HISTORY
+        if overflow > 0:
+            for evicted in self.feedback_history[:overflow]:
+                self._count_elements(evicted, -1)
+            del self.feedback_history[:overflow]
+
+        self.save_history()
+
+    def _count_elements(self, parsed_feedback: Dict, delta: int):
+        """Ajoute (ou retire) les éléments manquants d'une entrée dans l'index"""
+        if not parsed_feedback.get("missing_elements"):
+            return
+
+        subject_key = parsed_feedback.get("subject") or ""
+        topic_key = parsed_feedback.get("topic") or ""
+        topics = self.element_counts.setdefault(subject_key, {})
+        counts = topics.setdefault(topic_key, {})
+
+        for element in parsed_feedback["missing_elements"]:
+            counts[element] = counts.get(element, 0) + delta
+            if counts[element] <= 0:
+                del counts[element]
+
+        if not counts:
+            del topics[topic_key]
+        if not topics:
+            del self.element_counts[subject_key]
+
+    @staticmethod
+    def _build_element_counts(history: List[Dict]) -> Dict:
+        """Reconstruit l'index (matière, thème) -> compteurs depuis l'historique"""
+        element_counts = {}
+        for feedback in history:
+            counts = element_counts.setdefault(feedback.get("subject") or "", {}).setdefault(
+                feedback.get("topic") or "", {}
+            )
+            for element in feedback.get("missing_elements", []):
+                counts[element] = counts.get(element, 0) + 1
+        return element_counts
 
     def parse_feedback_text(self, feedback_text: str, subject: str = None, topic: str = None) -> Dict:
         """
@@ -92,46 +191,16 @@ class PedagogicalFeedback:
         Returns:
             Dict avec les éléments identifiés
         """
-        feedback_lower = feedback_text.lower()
-
         result = {
             "original_text": feedback_text,
             "subject": subject,
             "topic": topic,
-            "missing_elements": [],
-            "quality_issues": [],
-            "sentiment": self._detect_sentiment(feedback_lower),
+            **analyze_feedback_text(feedback_text),
             "timestamp": datetime.now().isoformat()
         }
 
-        # Détecter les éléments manquants
-        is_complaint = any(
-            re.search(pattern, feedback_lower)
-            for pattern in self.MISSING_INDICATORS
-        )
-
-        if is_complaint:
-            for element_type, patterns in self.ELEMENT_PATTERNS.items():
-                for pattern in patterns:
-                    if re.search(pattern, feedback_lower):
-                        if element_type not in result["missing_elements"]:
-                            result["missing_elements"].append(element_type)
-
-        # Détecter les problèmes de qualité
-        for indicator in self.QUALITY_INDICATORS:
-            if re.search(indicator, feedback_lower):
-                # Identifier quel élément pose problème
-                for element_type, patterns in self.ELEMENT_PATTERNS.items():
-                    for pattern in patterns:
-                        if re.search(pattern, feedback_lower):
-                            result["quality_issues"].append({
-                                "element": element_type,
-                                "issue": "unclear"
-                            })
-                            break
-
         # Enregistrer dans l'historique
-        self.feedback_history.append(result)
+        self._record_history(result)
 
         # Mettre à jour la mémoire de savoir si disponible
         if self.knowledge_memory and result["missing_elements"]:
@@ -152,14 +221,127 @@ class PedagogicalFeedback:
         result = self.parse_feedback_text(feedback_text)
         return result["missing_elements"]
 
-    def _detect_sentiment(self, text: str) -> str:
-        """Détecte le sentiment général du feedback"""
-        positive_words = ["bien", "super", "parfait", "merci", "top", "génial", "utile"]
-        negative_words = ["nul", "mauvais", "inutile", "horrible", "décevant", "frustrant"]
+    def parse_many(
+        self,
+        feedback_items: List[Union[str, Dict]],
+        processes: int = None
+    ) -> List[Dict]:
+        """
+        Analyse un lot de feedbacks (ex: questionnaires de fin de trimestre)
+
+        Les éléments manquants sont agrégés par (matière, thème) puis appliqués
+        à la mémoire de savoir en une seule écriture ; l'historique n'est
+        sauvegardé qu'une fois.
+
+        Args:
+            feedback_items: Textes, ou dicts {"text", "subject", "topic"}
+            processes: Nombre de processus pour l'analyse (None = séquentiel).
+                Sous Windows, l'appelant doit être protégé par
+                `if __name__ == "__main__":`.
+
+        Returns:
+            Liste des résultats, dans l'ordre des entrées
+        """
+        items = [
+            item if isinstance(item, dict) else {"text": item}
+            for item in feedback_items
+        ]
+        texts = [item.get("text", "") for item in items]
 
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        if processes and processes > 1 and len(texts) > 1:
+            chunksize = max(1, len(texts) // (processes * 4))
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                analyses = list(executor.map(analyze_feedback_text, texts, chunksize=chunksize))
+        else:
+            analyses = [analyze_feedback_text(text) for text in texts]
+
+        timestamp = datetime.now().isoformat()
+        results = []
+        increments = {}
+        for item, text, analysis in zip(items, texts, analyses):
+            result = {
+                "original_text": text,
+                "subject": item.get("subject"),
+                "topic": item.get("topic"),
+                **analysis,
+                "timestamp": timestamp
+            }
+            results.append(result)
+
+            if result["subject"] and result["missing_elements"]:
+                counts = increments.setdefault((result["subject"], result["topic"]), {})
+                for element in result["missing_elements"]:
+                    counts[element] = counts.get(element, 0) + 1
+
+        self._record_history_batch(results)
+
+        if self.knowledge_memory and increments:
+            self.knowledge_memory.record_missing_batch(increments)
+
+        return results
+
+    @classmethod
+    def _get_scanner(cls) -> Tuple[Pattern, List[Tuple[str, str]]]:
+        """
+        Compile une fois tous les motifs en une alternance à groupes nommés
+
+        L'alternance est placée dans un lookahead : un seul finditer trouve
+        toutes les occurrences, y compris celles qui se chevauchent
+        (ex: "utile" dans "inutile").
+
+        Returns:
+            (expression compilée, [(nature, libellé)] indexé par numéro de groupe)
+        """
+        if cls._scanner is None:
+            alternatives = []
+            labels = []
+
+            def add(kind: str, label: str, pattern: str):
+                alternatives.append(f"(?P<g{len(labels)}>{pattern})")
+                labels.append((kind, label))
+
+            for pattern in cls.MISSING_INDICATORS:
+                add("missing", pattern, pattern)
+            for pattern in cls.QUALITY_INDICATORS:
+                add("quality", pattern, pattern)
+            for element_type, patterns in cls.ELEMENT_PATTERNS.items():
+                for pattern in patterns:
+                    add("element", element_type, pattern)
+            for word in cls.POSITIVE_WORDS:
+                add("positive", word, re.escape(word))
+            for word in cls.NEGATIVE_WORDS:
+                add("negative", word, re.escape(word))
 
+            cls._scanner = (re.compile("(?=" + "|".join(alternatives) + ")"), labels)
+
+        return cls._scanner
+
+    @classmethod
+    def _scan(cls, text: str) -> Dict[str, set]:
+        """
+        Parcourt le texte (déjà en minuscules) une seule fois
+
+        Returns:
+            Dict nature -> ensemble des libellés trouvés
+        """
+        scanner, labels = cls._get_scanner()
+        found = {"missing": set(), "quality": set(), "element": set(), "positive": set(), "negative": set()}
+
+        for match in scanner.finditer(text):
+            kind, label = labels[int(match.lastgroup[1:])]
+            found[kind].add(label)
+
+        return found
+
+    @classmethod
+    def _detect_sentiment(cls, text: str) -> str:
+        """Détecte le sentiment général du feedback"""
+        found = cls._scan(text)
+        return cls._sentiment_from_counts(len(found["positive"]), len(found["negative"]))
+
+    @staticmethod
+    def _sentiment_from_counts(positive_count: int, negative_count: int) -> str:
+        """Déduit le sentiment du nombre de mots positifs et négatifs distincts"""
         if positive_count > negative_count:
             return "positive"
         elif negative_count > positive_count:
@@ -175,12 +357,11 @@ class PedagogicalFeedback:
         subject = parsed_feedback.get("subject")
         topic = parsed_feedback.get("topic", "general")
 
-        for element in parsed_feedback["missing_elements"]:
-            self.knowledge_memory.record_missing_element(
-                subject=subject,
-                topic=topic,
-                element_type=element
-            )
+        self.knowledge_memory.record_multiple_missing(
+            subject=subject,
+            topic=topic,
+            elements=parsed_feedback["missing_elements"]
+        )
 
     def get_enrichment_suggestions(self, subject: str, topic: str = None) -> List[Dict]:
         """
@@ -193,24 +374,26 @@ class PedagogicalFeedback:
         Returns:
             Liste de suggestions avec priorité
         """
-        # Filtrer le feedback pertinent
-        relevant_feedback = [
-            f for f in self.feedback_history
-            if f.get("subject") == subject and (topic is None or f.get("topic") == topic)
-        ]
+        # Lire les compteurs indexés par (matière, thème)
+        topics = self.element_counts.get(subject or "", {})
+        if topic is None:
+            missing_counts = {}
+            for counts in topics.values():
+                for element, count in counts.items():
+                    missing_counts[element] = missing_counts.get(element, 0) + count
+        else:
+            missing_counts = topics.get(topic or "", {})
 
-        if not relevant_feedback:
+        if not missing_counts:
             return []
 
-        # Compter les éléments manquants
-        missing_counts = {}
-        for feedback in relevant_feedback:
-            for element in feedback.get("missing_elements", []):
-                missing_counts[element] = missing_counts.get(element, 0) + 1
-
         # Générer les suggestions triées par fréquence
+        element_order = list(self.ELEMENT_PATTERNS)
         suggestions = []
-        for element, count in sorted(missing_counts.items(), key=lambda x: x[1], reverse=True):
+        for element, count in sorted(
+            missing_counts.items(),
+            key=lambda x: (-x[1], element_order.index(x[0]) if x[0] in element_order else len(element_order))
+        ):
             priority = "high" if count >= 3 else "medium" if count >= 2 else "low"
             suggestions.append({
                 "element_type": element,
@@ -293,3 +476,33 @@ class PedagogicalFeedback:
                 quick_fixes.append(suggestion["action"])
 
         return quick_fixes
+
+
+def analyze_feedback_text(feedback_text: str) -> Dict:
+    """
+    Analyse pure d'un texte de feedback (sans historique ni mémoire)
+
+    Fonction de module pour pouvoir être envoyée à un pool de processus.
+
+    Returns:
+        Dict avec missing_elements, quality_issues et sentiment
+    """
+    found = PedagogicalFeedback._scan(feedback_text.lower())
+
+    # Types d'éléments cités, dans l'ordre de ELEMENT_PATTERNS
+    elements = [
+        element_type for element_type in PedagogicalFeedback.ELEMENT_PATTERNS
+        if element_type in found["element"]
+    ]
+
+    return {
+        # Éléments manquants : seulement si le texte exprime un manque
+        "missing_elements": elements if found["missing"] else [],
+        # Problèmes de qualité : un par indicateur trouvé et par élément cité
+        "quality_issues": [
+            {"element": element_type, "issue": "unclear"}
+            for _ in found["quality"]
+            for element_type in elements
+        ],
+        "sentiment": PedagogicalFeedback._sentiment_from_counts(len(found["positive"]), len(found["negative"]))
+    }
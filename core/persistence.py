@@ -0,0 +1,98 @@
+"""
+Persistance JSON - Écritures atomiques et unité de travail
+
+Chaque magasin (profil, feedback, mémoire de savoir, log web) passe ses
+sauvegardes par schedule_save(). Hors transaction, l'écriture est immédiate ;
+dans un bloc `with transaction():`, le fichier est seulement marqué « sale »
+et écrit une seule fois à la sortie du bloc.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+# Sauvegardes en attente de la transaction ouverte (une par thread)
+_local = threading.local()
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """
+    Écrit un fichier JSON de façon atomique
+
+    Le contenu est écrit dans un fichier temporaire du même dossier puis
+    renommé : un lecteur voit toujours soit l'ancien, soit le nouveau fichier.
+
+    Args:
+        path: Fichier de destination
+        data: Données sérialisables
+        indent: Indentation (None = JSON compact, pour les index générés)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def in_transaction() -> bool:
+    """Indique si une transaction est ouverte dans le thread courant"""
+    return getattr(_local, "pending", None) is not None
+
+
+def schedule_save(path: str, flush: Callable[[], None]):
+    """
+    Demande la sauvegarde d'un fichier
+
+    Args:
+        path: Fichier concerné (clé de regroupement)
+        flush: Fonction qui écrit réellement le fichier
+    """
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        flush()
+    else:
+        # Une entrée par (fichier, magasin) : deux objets sur le même fichier s'écrivent tous les deux
+        owner = getattr(flush, "__self__", flush)
+        pending[(os.path.abspath(path), id(owner))] = flush
+
+
+@contextmanager
+def transaction():
+    """
+    Unité de travail : regroupe toutes les sauvegardes du bloc
+
+    Chaque fichier modifié est écrit au plus une fois, à la sortie du bloc
+    (y compris en cas d'exception, car l'état en mémoire n'est pas annulé).
+    Les transactions imbriquées sont absorbées par la transaction externe.
+
+    Exemple:
+        with transaction():
+            personalization.focus_duration = 25
+            personalization.record_activity_hour(17)
+            feedback.record_duration_feedback(task_id, 20, 25)
+    """
+    if in_transaction():
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+    finally:
+        pending = _local.pending
+        _local.pending = None
+        for flush in pending.values():
+            flush()
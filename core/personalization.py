@@ -1,20 +1,83 @@
 """
 Système de personnalisation utilisateur - Profil dynamique adaptatif
 """
+import copy
 import json
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-from config.settings import USER_PROFILE_FILE, DEFAULT_USER_PROFILE, DATA_DIR
+from config.settings import (
+    USER_PROFILE_FILE, DEFAULT_USER_PROFILE, DATA_DIR, ACTIVITY_DECAY, ACTIVITY_TOP_K
+)
+from config.tdah_rules import TDAH_RULES
+from core.estimators import ewma_merge, ewma_update, TopK
+from core.persistence import atomic_write_json, schedule_save
 
 
 class UserPersonalization:
-    """Gère le profil utilisateur et ses préférences adaptatives"""
+    """
+    Gère le profil utilisateur et ses préférences adaptatives
+
+    Utiliser UserPersonalization.shared() pour obtenir l'instance partagée
+    d'un fichier de profil : le fichier est revalidé (mtime + taille) avant
+    chaque lecture et les sauvegardes fusionnent les modifications faites
+    entre-temps par un autre processus au lieu de les écraser.
+    """
+
+    # Histogramme d'activité : 7 jours x 24 heures, indice = jour * 24 + heure
+    WEEK_SLOTS = 7 * 24
+    DEFAULT_BEST_HOURS = [9, 14, 16]
+
+    # Ajustement des estimations selon la difficulté
+    DIFFICULTY_MULTIPLIERS = {"easy": 0.8, "medium": 1.0, "hard": 1.3}
+
+    # Compteurs fusionnés entrée par entrée quand les deux côtés ont changé
+    MERGED_KEYS = {
+        "activity_week": "_merge_activity_week",
+        "duration_estimators": "_merge_duration_estimators",
+        "subject_preferences": "_merge_subject_preferences"
+    }
+
+    # Registre process-wide : chemin absolu du profil -> instance partagée
+    _shared_instances: Dict[str, "UserPersonalization"] = {}
+    _shared_lock = threading.Lock()
 
     def __init__(self, profile_file: str = None):
         self.profile_file = profile_file or USER_PROFILE_FILE
-        self.profile = self.load_profile()
+        self._lock = threading.RLock()
+        self._file_signature = None
+        self._activity_index = None
+        self._profile = self.load_profile()
+        # Dernier état connu du disque, base de la fusion à trois voies
+        self._synced = copy.deepcopy(self._profile)
+
+    @classmethod
+    def shared(cls, profile_file: str = None) -> "UserPersonalization":
+        """
+        Retourne l'instance partagée pour un fichier de profil
+
+        Args:
+            profile_file: Fichier de profil (défaut: USER_PROFILE_FILE)
+        """
+        path = os.path.abspath(profile_file or USER_PROFILE_FILE)
+        with cls._shared_lock:
+            instance = cls._shared_instances.get(path)
+            if instance is None:
+                instance = cls(path)
+                cls._shared_instances[path] = instance
+            return instance
+
+    @property
+    def profile(self) -> Dict:
+        """Profil courant, rechargé si le fichier a changé sur disque"""
+        self._revalidate()
+        return self._profile
+
+    @profile.setter
+    def profile(self, value: Dict):
+        self._profile = value
 
     def load_profile(self) -> Dict:
         """Charge le profil utilisateur depuis le fichier"""
@@ -22,25 +85,206 @@ class UserPersonalization:
             # Créer le dossier data si nécessaire
             os.makedirs(os.path.dirname(self.profile_file), exist_ok=True)
 
+            self._file_signature = self._stat_signature()
             if os.path.exists(self.profile_file):
                 with open(self.profile_file, 'r', encoding='utf-8') as f:
                     loaded = json.load(f)
                     # Fusionner avec les valeurs par défaut
-                    profile = {**DEFAULT_USER_PROFILE, **loaded}
+                    profile = {**copy.deepcopy(DEFAULT_USER_PROFILE), **loaded}
+                    self._migrate_duration_history(profile)
+                    self._decode_activity_week(profile)
+                    self._migrate_preferred_hours(profile)
                     return profile
         except Exception as e:
             print(f"⚠️ Erreur chargement profil: {e}")
 
-        return DEFAULT_USER_PROFILE.copy()
+        return copy.deepcopy(DEFAULT_USER_PROFILE)
+
+    @staticmethod
+    def _migrate_duration_history(profile: Dict):
+        """Convertit l'ancien historique brut des durées en estimateurs exponentiels"""
+        history = profile.pop("duration_history", None)
+        if not history:
+            return
+
+        estimators = profile.setdefault("duration_estimators", {})
+        for category, durations in history.items():
+            if category in estimators:
+                continue
+            state = None
+            for duration in durations:
+                state = ewma_update(state, duration)
+            if state:
+                estimators[category] = state
+
+    @classmethod
+    def _migrate_preferred_hours(cls, profile: Dict):
+        """Répartit l'ancien compteur par heure (sans jour) sur les 7 jours de la semaine"""
+        hours = profile.pop("preferred_hours", None)
+        if not hours or profile.get("activity_week", {}).get("counts"):
+            return
+
+        counts = [0.0] * cls.WEEK_SLOTS
+        for hour, count in hours.items():
+            for weekday in range(7):
+                counts[weekday * 24 + int(hour) % 24] += count / 7
+        profile["activity_week"] = {"counts": counts, "increment": 1.0}
+
+    @staticmethod
+    def _decode_activity_week(profile: Dict):
+        """Décode l'histogramme stocké sur disque (7 lignes de 24 valeurs)"""
+        week = profile.get("activity_week")
+        if not week or "days" not in week:
+            return
+        profile["activity_week"] = {
+            "counts": [float(value) for day in week["days"] for value in day.split()],
+            "increment": week.get("increment", 1.0)
+        }
+
+    @staticmethod
+    def _serialize_profile(profile: Dict) -> Dict:
+        """Copie du profil prête à écrire (histogramme normalisé, encodé en 7 lignes)"""
+        week = profile.get("activity_week")
+        if not week or "counts" not in week:
+            return profile
+
+        counts = week["counts"]
+        increment = week["increment"]
+        days = [
+            " ".join(f"{value / increment:.6g}" for value in counts[day * 24:(day + 1) * 24])
+            for day in range(7)
+        ]
+        return {**profile, "activity_week": {"days": days, "increment": 1.0}}
 
     def save_profile(self):
-        """Sauvegarde le profil utilisateur"""
+        """Sauvegarde le profil utilisateur (différée si une transaction est ouverte)"""
+        schedule_save(self.profile_file, self._write_profile)
+
+    def _write_profile(self):
+        """Écrit le profil sur disque en fusionnant les changements externes"""
+        with self._lock:
+            try:
+                if self._stat_signature() != self._file_signature:
+                    self._merge_from_disk()
+                atomic_write_json(self.profile_file, self._serialize_profile(self._profile))
+                self._synced = copy.deepcopy(self._profile)
+                self._file_signature = self._stat_signature()
+            except Exception as e:
+                print(f"⚠️ Erreur sauvegarde profil: {e}")
+
+    # ========================================
+    # SYNCHRONISATION AVEC LE DISQUE
+    # ========================================
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """Signature (mtime, taille) du fichier de profil, None s'il n'existe pas"""
         try:
-            os.makedirs(os.path.dirname(self.profile_file), exist_ok=True)
-            with open(self.profile_file, 'w', encoding='utf-8') as f:
-                json.dump(self.profile, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"⚠️ Erreur sauvegarde profil: {e}")
+            stat = os.stat(self.profile_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _revalidate(self):
+        """Recharge le profil si un autre processus l'a modifié"""
+        signature = self._stat_signature()
+        if signature is None or signature == self._file_signature:
+            return
+
+        with self._lock:
+            if self._stat_signature() != self._file_signature:
+                self._merge_from_disk()
+
+    def _merge_from_disk(self):
+        """
+        Fusionne le profil disque avec les modifications locales non sauvegardées
+
+        Les clés modifiées localement depuis la dernière synchronisation
+        l'emportent ; toutes les autres prennent la valeur du disque. Les
+        compteurs (MERGED_KEYS) modifiés des deux côtés sont additionnés :
+        les activités et durées enregistrées par chaque processus sont gardées.
+        """
+        base = self._synced
+        disk_profile = self.load_profile()
+        self._synced = copy.deepcopy(disk_profile)
+
+        for key, value in self._profile.items():
+            if key in base and base[key] == value:
+                continue
+            merge = self.MERGED_KEYS.get(key)
+            disk_value = disk_profile.get(key)
+            if merge and disk_value and disk_value != base.get(key):
+                value = getattr(self, merge)(base.get(key) or {}, value, disk_value)
+            disk_profile[key] = value
+
+        self._profile = disk_profile
+
+    @staticmethod
+    def _merge_entries(base: Dict, local: Dict, disk: Dict, merge_entry) -> Dict:
+        """Fusion à trois voies d'un dictionnaire, entrée par entrée"""
+        merged = dict(disk)
+        for name, value in local.items():
+            previous = base.get(name)
+            if value == previous:
+                continue
+            if name in disk and disk[name] != previous:
+                value = merge_entry(previous, value, disk[name])
+            merged[name] = value
+        return merged
+
+    @classmethod
+    def _merge_duration_estimators(cls, base: Dict, local: Dict, disk: Dict) -> Dict:
+        """Rejoue les durées enregistrées localement sur les estimateurs du disque"""
+        return cls._merge_entries(base, local, disk, ewma_merge)
+
+    @classmethod
+    def _merge_subject_preferences(cls, base: Dict, local: Dict, disk: Dict) -> Dict:
+        """Additionne les séances de chaque matière (moyenne d'efficacité pondérée)"""
+        def merge_subject(previous: Optional[Dict], mine: Dict, theirs: Dict) -> Dict:
+            previous = previous or {"times_worked": 0, "avg_efficiency": 1.0}
+            added = mine["times_worked"] - previous["times_worked"]
+            if added <= 0:
+                return {**mine, "times_worked": theirs["times_worked"], "avg_efficiency": theirs["avg_efficiency"]}
+
+            total = theirs["times_worked"] + added
+            efficiency_sum = (
+                theirs["avg_efficiency"] * theirs["times_worked"]
+                + mine["avg_efficiency"] * mine["times_worked"]
+                - previous["avg_efficiency"] * previous["times_worked"]
+            )
+            return {**theirs, **mine, "times_worked": total, "avg_efficiency": efficiency_sum / total}
+
+        return cls._merge_entries(base, local, disk, merge_subject)
+
+    @classmethod
+    def _merge_activity_week(cls, base: Dict, local: Dict, disk: Dict) -> Dict:
+        """
+        Ajoute à l'histogramme du disque les activités enregistrées localement
+
+        Les valeurs sont comparées une fois normalisées (divisées par leur
+        incrément) ; l'oubli appliqué localement s'applique aussi aux
+        activités venues du disque.
+        """
+        local_counts = local.get("counts", [])
+        disk_counts = disk.get("counts", [])
+        if len(local_counts) != cls.WEEK_SLOTS or len(disk_counts) != cls.WEEK_SLOTS:
+            return local
+
+        base_counts = base.get("counts")
+        base_increment = base.get("increment", 1.0)
+        if not base_counts or len(base_counts) != cls.WEEK_SLOTS:
+            base_counts, base_increment = [0.0] * cls.WEEK_SLOTS, 1.0
+
+        local_increment = local["increment"]
+        if local_increment < base_increment:
+            return local  # Renormalisé localement : plus comparable à l'état commun
+
+        decay = base_increment / local_increment
+        disk_scale = decay / disk["increment"]
+        counts = [
+            theirs * disk_scale + (mine - previous) / local_increment
+            for theirs, mine, previous in zip(disk_counts, local_counts, base_counts)
+        ]
+        return {"counts": counts, "increment": 1.0}
 
     # ========================================
     # ACCESSEURS / MUTATEURS
@@ -127,25 +371,99 @@ class UserPersonalization:
         self.set_difficulty_bias(subject, new_bias)
 
     def get_preferred_hours(self) -> Dict[str, int]:
-        """Retourne les heures préférées avec leur fréquence"""
-        return self.profile.get("preferred_hours", {})
-
-    def record_activity_hour(self, hour: int):
-        """Enregistre une activité à une heure donnée"""
-        hours = self.profile.get("preferred_hours", {})
-        hour_str = str(hour)
-        hours[hour_str] = hours.get(hour_str, 0) + 1
-        self.profile["preferred_hours"] = hours
+        """Retourne les heures préférées avec leur fréquence (tous jours confondus)"""
+        index = self._get_activity_index()
+        scale = index["increment"]
+        return {
+            str(hour): round(total / scale)
+            for hour, total in enumerate(index["hour_totals"])
+            if total > 0
+        }
+
+    def record_activity_hour(self, hour: int, weekday: int = None, decay: float = ACTIVITY_DECAY):
+        """
+        Enregistre une activité dans l'histogramme heure x jour de la semaine
+
+        Args:
+            hour: Heure (0-23)
+            weekday: Jour (0 = lundi), aujourd'hui par défaut
+            decay: Facteur d'oubli appliqué aux activités passées (1.0 = aucun)
+        """
+        if weekday is None:
+            weekday = datetime.now().weekday()
+
+        week = self._get_activity_week()
+        index = self._get_activity_index()
+
+        # Décroissance paresseuse : on grossit l'incrément au lieu de réduire les 168 cases
+        if decay < 1.0:
+            week["increment"] /= decay
+        increment = week["increment"]
+
+        slot = (weekday % 7) * 24 + hour % 24
+        week["counts"][slot] += increment
+        index["hour_totals"][hour % 24] += increment
+        index["slots"].bump(slot)
+        index["hours"].bump(hour % 24)
+
+        if increment > 1e9:
+            # Renormaliser avant de perdre en précision
+            week["counts"] = [count / increment for count in week["counts"]]
+            week["increment"] = 1.0
+            self._activity_index = None
+
         self.save_profile()
 
+    def get_best_slots(self, top_n: int = 3) -> List[Tuple[int, int]]:
+        """
+        Retourne les créneaux (jour, heure) les plus productifs de la semaine
+
+        Args:
+            top_n: Nombre de créneaux (O(top_n) tant que top_n <= ACTIVITY_TOP_K)
+
+        Returns:
+            Liste de tuples (jour 0-6 avec 0 = lundi, heure 0-23)
+        """
+        return [divmod(slot, 24) for slot in self._get_activity_index()["slots"].top(top_n)]
+
     def get_best_hours(self, top_n: int = 3) -> List[int]:
         """Retourne les heures les plus productives"""
-        hours = self.get_preferred_hours()
+        hours = self._get_activity_index()["hours"].top(top_n)
         if not hours:
-            return [9, 14, 16]  # Heures par défaut
+            return list(self.DEFAULT_BEST_HOURS)  # Heures par défaut
+        return hours
+
+    def _get_activity_week(self) -> Dict:
+        """Retourne l'histogramme d'activité, créé vide si besoin"""
+        week = self.profile.get("activity_week")
+        if not week or len(week.get("counts", [])) != self.WEEK_SLOTS:
+            week = {"counts": [0.0] * self.WEEK_SLOTS, "increment": 1.0}
+            self.profile["activity_week"] = week
+        return week
+
+    def _get_activity_index(self) -> Dict:
+        """
+        Index dérivé de l'histogramme (totaux par heure + classements top-k)
 
-        sorted_hours = sorted(hours.items(), key=lambda x: x[1], reverse=True)
-        return [int(h) for h, _ in sorted_hours[:top_n]]
+        Reconstruit seulement si l'histogramme a été remplacé (rechargement
+        depuis le disque, renormalisation).
+        """
+        week = self._get_activity_week()
+        index = self._activity_index
+        if index is not None and index["source"] is week["counts"]:
+            index["increment"] = week["increment"]
+            return index
+
+        counts = week["counts"]
+        hour_totals = [sum(counts[day * 24 + hour] for day in range(7)) for hour in range(24)]
+        self._activity_index = {
+            "source": counts,
+            "increment": week["increment"],
+            "hour_totals": hour_totals,
+            "slots": TopK(counts, ACTIVITY_TOP_K),
+            "hours": TopK(hour_totals, ACTIVITY_TOP_K)
+        }
+        return self._activity_index
 
     def increment_tasks_completed(self):
         """Incrémente le compteur de tâches complétées"""
@@ -281,26 +599,78 @@ class UserPersonalization:
         Returns:
             int: Temps estimé personnalisé en minutes
         """
-        # Récupérer l'historique des durées pour cette catégorie
-        duration_history = self.profile.get("duration_history", {})
-        category_history = duration_history.get(category, [])
+        category_means = self._get_category_means()
 
-        # Si on a assez d'historique (au moins 3 entrées), utiliser la moyenne
-        if len(category_history) >= 3:
-            avg_time = sum(category_history) / len(category_history)
-            # Pondération 70% historique, 30% estimation de base
-            estimated = int(avg_time * 0.7 + base_time * 0.3)
-        else:
-            estimated = base_time
+        # Ajuster selon la sensibilité à la fatigue (ajoute du temps si fatigué)
+        fatigue_mult = 1.0 + (self.fatigue_sensitivity * 0.2)
 
-        # Ajuster selon le biais de difficulté utilisateur
-        difficulty_multipliers = {"easy": 0.8, "medium": 1.0, "hard": 1.3}
-        difficulty_mult = difficulty_multipliers.get(difficulty, 1.0)
+        return self._combine_estimate(
+            category_means.get(category),
+            base_time,
+            self.DIFFICULTY_MULTIPLIERS.get(difficulty, 1.0),
+            fatigue_mult
+        )
 
-        # Ajuster selon la sensibilité à la fatigue (ajoute du temps si fatigué)
+    def estimate_plan(self, subtasks: List[Dict]) -> Dict:
+        """
+        Estime en une seule passe la durée de toutes les étapes d'un plan
+
+        Les moyennes par catégorie et les multiplicateurs sont calculés une
+        fois pour tout le plan, ce qui permet de réestimer en direct pendant
+        que l'élève modifie ses étapes.
+
+        Args:
+            subtasks: Étapes du plan (category, difficulty, estimatedTime optionnel)
+
+        Returns:
+            Dict avec "estimates" (minutes, dans l'ordre du plan) et "total"
+        """
+        category_means = self._get_category_means()
         fatigue_mult = 1.0 + (self.fatigue_sensitivity * 0.2)
+        base_times = TDAH_RULES["CATEGORY_BASE_TIME"]
+        default_base = base_times["autre"]
+        multipliers = self.DIFFICULTY_MULTIPLIERS
+        combine = self._combine_estimate
+
+        estimates = []
+        for subtask in subtasks:
+            category = subtask.get("category", "autre")
+            base_time = (
+                subtask.get("estimatedTime")
+                or subtask.get("estimated_time")
+                or base_times.get(category, default_base)
+            )
+            estimates.append(combine(
+                category_means.get(category),
+                base_time,
+                multipliers.get(subtask.get("difficulty"), 1.0),
+                fatigue_mult
+            ))
+
+        return {"estimates": estimates, "total": sum(estimates)}
+
+    def _get_category_means(self) -> Dict[str, float]:
+        """Moyennes courantes des durées par catégorie (au moins 3 observations)"""
+        return {
+            category: estimator["mean"]
+            for category, estimator in self.profile.get("duration_estimators", {}).items()
+            if estimator.get("count", 0) >= 3
+        }
+
+    @staticmethod
+    def _combine_estimate(
+        category_mean: Optional[float],
+        base_time: int,
+        difficulty_mult: float,
+        fatigue_mult: float
+    ) -> int:
+        """Combine historique, temps de base et multiplicateurs (borné 5-45 min)"""
+        if category_mean is not None:
+            # Pondération 70% historique, 30% estimation de base
+            estimated = int(category_mean * 0.7 + base_time * 0.3)
+        else:
+            estimated = base_time
 
-        # Calcul final
         final_estimate = int(estimated * difficulty_mult * fatigue_mult)
 
         # Borner entre 5 et 45 minutes
@@ -314,19 +684,8 @@ class UserPersonalization:
             category: Catégorie de la tâche
             actual_duration: Durée réelle en minutes
         """
-        if "duration_history" not in self.profile:
-            self.profile["duration_history"] = {}
-
-        if category not in self.profile["duration_history"]:
-            self.profile["duration_history"][category] = []
-
-        # Garder les 20 dernières entrées par catégorie
-        history = self.profile["duration_history"][category]
-        history.append(actual_duration)
-        if len(history) > 20:
-            history = history[-20:]
-
-        self.profile["duration_history"][category] = history
+        estimators = self.profile.setdefault("duration_estimators", {})
+        estimators[category] = ewma_update(estimators.get(category), actual_duration)
         self.save_profile()
 
 
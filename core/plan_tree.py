@@ -0,0 +1,126 @@
+"""
+Plan hiérarchique - Étapes principales et micro-étapes d'une décomposition
+Un seul arbre sert tous les niveaux de spiciness (1 à 5).
+"""
+import re
+from typing import Dict, List
+
+# Ligne numérotée sur un ou plusieurs niveaux : "2.", "2.1", "2.1.3)"...
+NUMBERED_LINE = re.compile(r'^\s*(\d+(?:\.\d+)*)[.)]?\s+(.+?)\s*$')
+
+
+class PlanTree:
+    """
+    Arbre de plan : liste de nœuds {"title": str, "children": [nœuds]}
+
+    Exemple de réponse de l'IA :
+        1. Comprendre le sujet
+           1.1 Lire l'énoncé
+           1.2 Surligner les mots-clés
+        2. Rédiger
+           2.1 ...
+    """
+
+    # Variante de clé du cache de décomposition réservée aux arbres complets
+    CACHE_VARIANT = "arbre"
+
+    @staticmethod
+    def parse(text: str) -> List[Dict]:
+        """
+        Construit l'arbre à partir des lignes numérotées de la réponse
+
+        La profondeur d'une ligne est le nombre de composantes de son numéro
+        ("2" → 1, "2.1" → 2). Une ligne trop profonde pour sa position est
+        rattachée au dernier nœud disponible.
+        """
+        roots: List[Dict] = []
+        # stack[d] = dernier nœud vu à la profondeur d+1
+        stack: List[Dict] = []
+
+        for line in text.split('\n'):
+            match = NUMBERED_LINE.match(line)
+            if not match:
+                continue
+
+            depth = min(match.group(1).count('.') + 1, len(stack) + 1)
+            node = {"title": match.group(2), "children": []}
+
+            del stack[depth - 1:]
+            if stack:
+                stack[-1]["children"].append(node)
+            else:
+                roots.append(node)
+            stack.append(node)
+
+        return roots
+
+    @staticmethod
+    def flatten(tree: List[Dict], max_tasks: int) -> List[str]:
+        """Titres des étapes retenues par select(), dans l'ordre"""
+        return [node["title"] for node in PlanTree.select(tree, max_tasks)]
+
+    @staticmethod
+    def select(tree: List[Dict], max_tasks: int) -> List[Dict]:
+        """
+        Dérive une liste d'étapes d'au plus max_tasks titres
+
+        Part des étapes principales puis développe le plan niveau par
+        niveau : les nœuds du niveau sont remplacés par leurs micro-étapes,
+        les plus découpés d'abord (puis dans l'ordre du plan), tant que le
+        total reste dans la limite. Un niveau développé en partie arrête
+        la descente : deux granularités au plus dans un même plan. Plus
+        max_tasks est grand, plus le plan est détaillé.
+
+        Args:
+            tree: Arbre du plan
+            max_tasks: Nombre maximum d'étapes (SPICINESS_LEVELS[n]["max_subtasks"])
+
+        Returns:
+            Les nœuds retenus, dans l'ordre (avec leurs micro-étapes non développées)
+        """
+        # Comme parse_response : au-delà de la limite, les dernières étapes sont coupées
+        items = tree[:max_tasks]
+
+        while True:
+            # Un nœud sans vrai découpage (0 ou 1 enfant) reste tel quel
+            expandable = sorted(
+                (position for position, node in enumerate(items) if len(node.get("children") or []) > 1),
+                key=lambda position: (-len(items[position]["children"]), position)
+            )
+
+            chosen = set()
+            total = len(items)
+            for position in expandable:
+                added = len(items[position]["children"]) - 1
+                if total + added <= max_tasks:
+                    chosen.add(position)
+                    total += added
+            if not chosen:
+                break
+
+            items = [
+                child
+                for position, node in enumerate(items)
+                for child in (node["children"] if position in chosen else [node])
+            ]
+            if len(chosen) < len(expandable):
+                break
+
+        return items
+
+
+if __name__ == "__main__":
+    # Vérification rapide : chaque niveau de spiciness donne un plan de taille différente
+    from config.tdah_rules import SPICINESS_LEVELS
+
+    sample = PlanTree.parse(
+        "1. Comprendre\n 1.1 a\n 1.2 b\n 1.3 c\n"
+        "2. Faire\n 2.1 d\n 2.2 e\n 2.3 f\n"
+        "3. Vérifier\n 3.1 g\n 3.2 h\n 3.3 i\n 3.4 j"
+    )
+    counts = [
+        len(PlanTree.flatten(sample, level["max_subtasks"]))
+        for level in SPICINESS_LEVELS.values()
+    ]
+    assert len(set(counts)) == len(counts), counts
+    print(f"✅ Étapes par spiciness (1 à 5) : {counts}")
@@ -2,23 +2,49 @@
 Planificateur de tâches - Décomposition intelligente avec système Goblin-style
 """
 import re
+import threading
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from config.settings import ANTHROPIC_API_KEY, ANTHROPIC_MODEL, ANTHROPIC_API_URL, API_TIMEOUT
-from config.tdah_rules import TDAH_RULES, SPICINESS_LEVELS, CATEGORY_CONFIG
+from config.settings import BATCH_CONCURRENCY, HEDGE_DEADLINE, HIERARCHICAL_DECOMPOSITION
+from config.tdah_rules import TDAH_RULES, SPICINESS_LEVELS
+from core.plan_tree import PlanTree
+from core.title_classifier import TitleClassifier
 
 
 class GoblinStyleDecomposer:
     """Décomposeur inspiré de Goblin Tools avec recherche web enrichie"""
 
+    TIER_LABELS = {"college": "COLLÈGE", "lycee": "LYCÉE", "universite": "UNIVERSITÉ"}
+
+    # Découpage d'une étape à la demande (expand_subtask)
+    MAX_MICRO_STEPS = 5
+    STEP_CACHE_VARIANT = "etape"
+    FALLBACK_MICRO_STEPS = {
+        "lecture": ["Ouvrir le document à la bonne page", "Lire le premier paragraphe", "Noter une idée importante", "Lire la suite (5 min)"],
+        "ecriture": ["Relire la consigne de l'étape", "Noter 3 idées en vrac", "Écrire une première phrase", "Continuer 5 min sans se corriger", "Relire ce qui est écrit"],
+        "recherche": ["Écrire la question à chercher", "Ouvrir une source fiable", "Noter 2 informations utiles", "Vérifier une deuxième source"],
+        "revision": ["Relire le titre et les objectifs", "Cacher la fiche et réciter", "Vérifier les oublis", "Noter ce qui reste à revoir"],
+        "exercices": ["Relire l'énoncé de l'exercice", "Souligner ce qui est demandé", "Faire la première question", "Vérifier le résultat"],
+        "organisation": ["Vider la table", "Sortir le matériel nécessaire", "Ranger le reste hors de vue"],
+        "apprentissage": ["Lire la notion une fois", "Redire la notion avec ses mots", "Faire un exemple simple", "Se tester sans regarder"],
+        "autre": ["Relire l'étape", "Faire la toute première action (2 min)", "Continuer 5 min", "Vérifier ce qui est fait"]
+    }
+
+    # Décompositions lancées en arrière-plan (mode couvert) : threads démons,
+    # qui ne retiennent pas la fin du programme, au plus BATCH_CONCURRENCY à la fois
+    _background_slots = threading.BoundedSemaphore(BATCH_CONCURRENCY)
+
     @staticmethod
     def decompose_with_spiciness(
         task_description: str,
         spiciness: int = 3,
         context: Dict = None,
         web_context: Dict = None,
-        use_api: bool = True
+        use_api: bool = True,
+        use_cache: bool = True
     ) -> List[Dict]:
         """
         Décompose une tâche avec niveau spiciness + enrichissement web
@@ -29,49 +55,598 @@ class GoblinStyleDecomposer:
             context: Contexte analysé (optionnel)
             web_context: Contexte web enrichi (optionnel)
             use_api: Utiliser l'API si disponible
+            use_cache: Réutiliser une décomposition déjà obtenue de l'API
         """
+        from core.task_analyzer import TaskAnalyzer
         if context is None:
-            from core.task_analyzer import TaskAnalyzer
             context = TaskAnalyzer.analyze_context(task_description)
 
         spicy_config = SPICINESS_LEVELS.get(spiciness, SPICINESS_LEVELS[3])
-        max_tasks = spicy_config["max_subtasks"]
-        detail_mult = spicy_config["detail_multiplier"]
 
         # Essayer l'API si disponible
-        if use_api and ANTHROPIC_API_KEY:
+        if use_api:
+            result = GoblinStyleDecomposer._decompose_via_api(
+                task_description, spiciness, context, web_context, use_cache
+            )
+            if result is not None:
+                return result[0]
+
+        # Fallback offline
+        print(f"⚠️ Mode hors ligne - Décomposition {spicy_config['label']}")
+        return GoblinStyleDecomposer.get_fallback_with_spiciness(task_description, context, spiciness)
+
+    @staticmethod
+    def decompose_many(
+        tasks: List[str],
+        spiciness: int = 3,
+        concurrency: int = BATCH_CONCURRENCY,
+        use_api: bool = True,
+        use_cache: bool = True
+    ) -> List[Dict]:
+        """
+        Décompose un lot de tâches en parallèle (ex: devoirs d'une semaine)
+
+        Les appels API passent par le limiteur de débit partagé. Une tâche dont
+        l'appel échoue reçoit le plan offline, sans bloquer le reste du lot.
+
+        Args:
+            tasks: Descriptions des tâches
+            spiciness: Niveau de détail (1-5)
+            concurrency: Nombre de décompositions simultanées
+            use_api: Utiliser l'API si disponible
+            use_cache: Réutiliser une décomposition déjà obtenue de l'API
+
+        Returns:
+            Un résultat par tâche, dans l'ordre d'entrée :
+            {"task", "success", "subtasks", "error", "source"}
+            (source : "cache", "api" ou "offline")
+        """
+        def decompose_one(task: str) -> Dict:
             try:
-                import requests
-                prompt = GoblinStyleDecomposer.build_spicy_prompt(
-                    task_description, context, spiciness, max_tasks, detail_mult, web_context
+                from core.task_analyzer import TaskAnalyzer
+                context = TaskAnalyzer.analyze_context(task)
+
+                result = None
+                if use_api:
+                    result = GoblinStyleDecomposer._decompose_via_api(
+                        task, spiciness, context, use_cache=use_cache
+                    )
+
+                if result is None:
+                    subtasks = GoblinStyleDecomposer.get_fallback_with_spiciness(
+                        task, context, spiciness if spiciness in SPICINESS_LEVELS else 3
+                    )
+                    result = (subtasks, "offline")
+
+                return {"task": task, "success": True, "subtasks": result[0], "error": None, "source": result[1]}
+
+            except Exception as e:
+                return {"task": task, "success": False, "subtasks": [], "error": str(e), "source": None}
+
+        if not tasks:
+            return []
+
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(tasks)))) as executor:
+            return list(executor.map(decompose_one, tasks))
+
+    @staticmethod
+    def decompose_hedged(
+        task_description: str,
+        spiciness: int = 3,
+        context: Dict = None,
+        web_context: Dict = None,
+        on_upgrade: Callable[[List[Dict]], None] = None,
+        deadline: float = HEDGE_DEADLINE
+    ) -> Tuple[List[Dict], Future]:
+        """
+        Décomposition « offline d'abord » : plan local immédiat, plan IA ensuite
+
+        Le plan offline (ou le plan en cache) est retourné tout de suite.
+        L'appel API continue en arrière-plan ; s'il aboutit avant `deadline`,
+        son plan est transmis à `on_upgrade` et devient le résultat du Future.
+        Sinon le Future vaut None dès `deadline` écoulé, sans attendre la fin
+        de l'appel (nouvelles tentatives comprises). Un plan arrivé trop tard
+        n'est pas proposé mais reste en cache.
+
+        Args:
+            task_description: Description de la tâche
+            spiciness: Niveau de détail (1-5)
+            context: Contexte analysé (optionnel)
+            web_context: Contexte web enrichi (optionnel)
+            on_upgrade: Appelée avec le plan de l'API (depuis un autre thread)
+            deadline: Délai maximal de remplacement, en secondes
+
+        Returns:
+            (plan immédiat, Future du plan amélioré ou None)
+        """
+        from core.task_analyzer import TaskAnalyzer
+        if context is None:
+            context = TaskAnalyzer.analyze_context(task_description)
+        if spiciness not in SPICINESS_LEVELS:
+            spiciness = 3
+
+        # Plan déjà connu : rien de mieux à attendre
+        cached = GoblinStyleDecomposer._get_cached_plan(task_description, spiciness, context, web_context)
+        if cached is not None:
+            upgrade = Future()
+            upgrade.set_result(None)
+            return cached, upgrade
+
+        started = time.monotonic()
+        upgrade = Future()
+        upgrade.set_running_or_notify_cancel()
+        settle_lock = threading.Lock()
+        settled = []
+
+        def claim() -> bool:
+            """Réserve le résultat du Future : le plan de l'API ou None à l'échéance, pas les deux"""
+            with settle_lock:
+                if settled:
+                    return False
+                settled.append(True)
+                return True
+
+        def expire():
+            if claim():
+                upgrade.set_result(None)
+
+        timer = threading.Timer(deadline, expire)
+        timer.daemon = True
+
+        def fetch_upgrade():
+            plan = None
+            try:
+                with GoblinStyleDecomposer._background_slots:
+                    # Le cache est déjà consulté : use_cache reste vrai pour enregistrer le résultat
+                    result = GoblinStyleDecomposer._decompose_via_api(
+                        task_description, spiciness, context, web_context
+                    )
+                if result is not None and result[1] != "offline" and time.monotonic() - started <= deadline:
+                    plan = result[0]
+            except Exception as e:
+                print(f"⚠️ Erreur décomposition en arrière-plan: {e}")
+
+            timer.cancel()
+            if not claim():
+                return
+
+            if plan is not None and on_upgrade is not None:
+                try:
+                    on_upgrade(plan)
+                except Exception as e:
+                    print(f"⚠️ Erreur mise à jour du plan: {e}")
+            upgrade.set_result(plan)
+
+        timer.start()
+        threading.Thread(target=fetch_upgrade, name="decompose-hedged", daemon=True).start()
+
+        fallback = GoblinStyleDecomposer.get_fallback_with_spiciness(task_description, context, spiciness)
+        return fallback, upgrade
+
+    @staticmethod
+    def decompose_streaming(
+        task_description: str,
+        spiciness: int = 3,
+        context: Dict = None,
+        web_context: Dict = None,
+        use_api: bool = True,
+        use_cache: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Décompose une tâche en livrant chaque sous-tâche dès qu'elle est prête
+
+        Consomme le flux de l'API et produit une sous-tâche à chaque ligne
+        numérotée complète, sans attendre la fin de la réponse. Si l'API ne
+        donne aucune étape, les étapes du fallback offline sont produites.
+
+        En mode hiérarchique (HIERARCHICAL_DECOMPOSITION), un arbre déjà en
+        cache est décliné directement. Sinon les étapes sont tout de même
+        diffusées au fil du flux (prompt à plat) : attendre l'arbre entier
+        retarderait la première étape. Le plan est alors mis en cache par
+        spiciness, entrée que _get_cached_plan consulte aussi dans ce mode.
+
+        Args:
+            task_description: Description de la tâche
+            spiciness: Niveau de détail (1-5)
+            context: Contexte analysé (optionnel)
+            web_context: Contexte web enrichi (optionnel)
+            use_api: Utiliser l'API si disponible
+            use_cache: Réutiliser une décomposition déjà obtenue de l'API
+
+        Yields:
+            Les sous-tâches, dans l'ordre
+        """
+        from core.task_analyzer import TaskAnalyzer
+        if context is None:
+            context = TaskAnalyzer.analyze_context(task_description)
+
+        spicy_config = SPICINESS_LEVELS.get(spiciness, SPICINESS_LEVELS[3])
+        max_tasks = spicy_config["max_subtasks"]
+        detail_mult = spicy_config["detail_multiplier"]
+
+        if use_api:
+            cache = cache_key = None
+            if use_cache:
+                cached = GoblinStyleDecomposer._get_cached_plan(task_description, spiciness, context, web_context)
+                if cached is not None:
+                    yield from cached
+                    return
+                cache, cache_key = GoblinStyleDecomposer._cache_slot(
+                    task_description, spiciness, context, web_context
                 )
 
-                response = requests.post(
-                    ANTHROPIC_API_URL,
-                    headers={
-                        "Content-Type": "application/json",
-                        "x-api-key": ANTHROPIC_API_KEY,
-                        "anthropic-version": "2023-06-01"
-                    },
-                    json={
-                        "model": ANTHROPIC_MODEL,
-                        "max_tokens": 3000,
-                        "messages": [{"role": "user", "content": prompt}]
-                    },
-                    timeout=API_TIMEOUT
+            from external.anthropic_client import AnthropicClient
+            client = AnthropicClient()
+
+            if client.is_available():
+                prefix, prompt = GoblinStyleDecomposer.build_spicy_prompt_parts(
+                    task_description, context, spiciness, max_tasks, detail_mult, web_context
                 )
+                stream = client.stream_message(prompt, max_tokens=3000, system_prompt=prefix)
+                stamp = int(time.time() * 1000)
+                subtasks = []
+                buffer = ""
+                finished = complete = False
 
-                if response.status_code == 200:
-                    data = response.json()
-                    text = next((c["text"] for c in data.get("content", []) if c.get("type") == "text"), "")
-                    return GoblinStyleDecomposer.parse_response(text, task_description, context, max_tasks)
+                while not finished and len(subtasks) < max_tasks:
+                    try:
+                        buffer += next(stream)
+                        *lines, buffer = buffer.split('\n')
+                    except StopIteration as stop:
+                        # Fin du flux : la dernière ligne n'a pas forcément de retour à la ligne
+                        finished = True
+                        complete = bool(stop.value)
+                        lines, buffer = [buffer], ""
 
-            except Exception as e:
-                print(f"⚠️ Erreur API: {e}")
+                    for line in lines:
+                        title = GoblinStyleDecomposer._parse_line(line)
+                        if title is not None and len(subtasks) < max_tasks:
+                            subtask = {"id": f"task-{stamp}-{len(subtasks)}", **GoblinStyleDecomposer._make_subtask(title)}
+                            subtasks.append(dict(subtask))
+                            yield subtask
+
+                if not finished:
+                    # Assez d'étapes : le reste de la réponse est ignoré
+                    stream.close()
+                    complete = True
+
+                if subtasks:
+                    # Un flux coupé en route n'est pas mis en cache
+                    if cache is not None and complete:
+                        cache.put(cache_key, subtasks)
+                    return
 
         # Fallback offline
         print(f"⚠️ Mode hors ligne - Décomposition {spicy_config['label']}")
-        return GoblinStyleDecomposer.get_fallback_with_spiciness(task_description, context, spiciness)
+        yield from GoblinStyleDecomposer.get_fallback_with_spiciness(task_description, context, spiciness)
+
+    @staticmethod
+    def _decompose_via_api(
+        task_description: str,
+        spiciness: int,
+        context: Dict,
+        web_context: Dict = None,
+        use_cache: bool = True
+    ) -> Optional[Tuple[List[Dict], str]]:
+        """
+        Décompose via le cache ou l'API, sans fallback offline
+
+        Returns:
+            (sous-tâches, source) avec source "cache", "api" ou "offline"
+            (réponse sans étape numérotée), ou None si l'API n'a rien donné
+        """
+        spicy_config = SPICINESS_LEVELS.get(spiciness, SPICINESS_LEVELS[3])
+        max_tasks = spicy_config["max_subtasks"]
+        detail_mult = spicy_config["detail_multiplier"]
+
+        if HIERARCHICAL_DECOMPOSITION:
+            # Un seul arbre par tâche, décliné localement pour chaque spiciness
+            result = GoblinStyleDecomposer.get_plan_tree(
+                task_description, context, web_context, use_cache
+            )
+            if result is None:
+                return None
+            return GoblinStyleDecomposer._subtasks_from_tree(result[0], max_tasks), result[1]
+
+        cache = cache_key = None
+        if use_cache:
+            cache, cache_key = GoblinStyleDecomposer._cache_slot(
+                task_description, spiciness, context, web_context
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return GoblinStyleDecomposer._assign_ids(cached), "cache"
+
+        try:
+            # Passe par le client partagé (session HTTP keep-alive commune)
+            from external.anthropic_client import AnthropicClient
+            client = AnthropicClient()
+
+            if not client.is_available():
+                return None
+
+            prefix, prompt = GoblinStyleDecomposer.build_spicy_prompt_parts(
+                task_description, context, spiciness, max_tasks, detail_mult, web_context
+            )
+            text = client.send_message(prompt, max_tokens=3000, system_prompt=prefix)
+            if text is None:
+                return None
+
+            subtasks = GoblinStyleDecomposer.parse_response(text, task_description, context, max_tasks)
+            # Ne garder que les vraies réponses de l'IA (pas le fallback du parseur)
+            if not GoblinStyleDecomposer._extract_lines(text):
+                return subtasks, "offline"
+
+            if cache is not None:
+                cache.put(cache_key, subtasks)
+            return subtasks, "api"
+
+        except Exception as e:
+            print(f"⚠️ Erreur API: {e}")
+            return None
+
+    @staticmethod
+    def get_plan_tree(
+        task_description: str,
+        context: Dict = None,
+        web_context: Dict = None,
+        use_cache: bool = True
+    ) -> Optional[Tuple[List[Dict], str]]:
+        """
+        Retourne le plan hiérarchique complet d'une tâche (cache ou API)
+
+        Args:
+            task_description: Description de la tâche
+            context: Contexte analysé (optionnel)
+            web_context: Contexte web enrichi (optionnel)
+            use_cache: Réutiliser un arbre déjà obtenu de l'API
+
+        Returns:
+            (arbre, source "cache" ou "api"), ou None si l'API n'a rien donné
+        """
+        if context is None:
+            from core.task_analyzer import TaskAnalyzer
+            context = TaskAnalyzer.analyze_context(task_description)
+
+        cache = cache_key = None
+        if use_cache:
+            cache, cache_key = GoblinStyleDecomposer._cache_slot(
+                task_description, PlanTree.CACHE_VARIANT, context, web_context
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached, "cache"
+
+        try:
+            from external.anthropic_client import AnthropicClient
+            client = AnthropicClient()
+
+            if not client.is_available():
+                return None
+
+            prefix, prompt = GoblinStyleDecomposer.build_tree_prompt_parts(
+                task_description, context, web_context
+            )
+            text = client.send_message(prompt, max_tokens=3000, system_prompt=prefix)
+            if text is None:
+                return None
+
+            tree = PlanTree.parse(text)
+            if not tree:
+                return None
+
+            if cache is not None:
+                cache.put(cache_key, tree)
+            return tree, "api"
+
+        except Exception as e:
+            print(f"⚠️ Erreur API: {e}")
+            return None
+
+    @staticmethod
+    def expand_subtask(
+        plan: List[Dict],
+        subtask_id: str,
+        task_description: str = "",
+        context: Dict = None,
+        use_api: bool = True,
+        use_cache: bool = True
+    ) -> List[Dict]:
+        """
+        Découpe à la demande une étape du plan en micro-étapes
+
+        Les micro-étapes sont rangées dans subtask["children"] avec des ids
+        "<id parent>.1", "<id parent>.2"... et peuvent à leur tour être
+        découpées. Une étape déjà découpée, ou issue d'un plan hiérarchique
+        qui en donnait les micro-étapes, est retournée telle quelle ; la
+        même étape de la même tâche (même plan, tier et matière) est servie
+        par le cache.
+
+        Args:
+            plan: Liste des sous-tâches (modifiée en place)
+            subtask_id: Id de l'étape à découper (à n'importe quelle profondeur)
+            task_description: Tâche d'origine, donnée comme contexte à l'IA
+            context: Contexte analysé (optionnel)
+            use_api: Utiliser l'API si disponible
+            use_cache: Réutiliser un découpage déjà obtenu de l'API
+
+        Returns:
+            Les micro-étapes ([] si l'id est introuvable)
+        """
+        subtask = GoblinStyleDecomposer._find_subtask(plan, subtask_id)
+        if subtask is None:
+            print(f"⚠️ Étape introuvable: {subtask_id}")
+            return []
+
+        if subtask.get("children"):
+            return subtask["children"]
+
+        if context is None:
+            from core.task_analyzer import TaskAnalyzer
+            context = TaskAnalyzer.analyze_context(task_description or subtask["title"])
+
+        children = None
+        if use_api:
+            children = GoblinStyleDecomposer._expand_via_api(
+                subtask["title"], plan, task_description, context, use_cache
+            )
+        if children is None:
+            children = GoblinStyleDecomposer._get_fallback_micro_steps(subtask)
+
+        subtask["children"] = children
+        GoblinStyleDecomposer._number_children(subtask)
+        return children
+
+    @staticmethod
+    def _expand_via_api(
+        step_title: str,
+        plan: List[Dict],
+        task_description: str,
+        context: Dict,
+        use_cache: bool = True
+    ) -> Optional[List[Dict]]:
+        """Découpe une étape via le cache ou l'API (micro-étapes sans ids), ou None"""
+        cache = cache_key = None
+        if use_cache:
+            # Clé construite sur tout ce que le prompt contient : étape, tâche et plan.
+            # Un titre générique (« Faire la première partie ») ne sert pas d'un devoir à l'autre
+            step_key = "\x1f".join(
+                [step_title, task_description or ""] + [subtask.get("title", "") for subtask in plan]
+            )
+            cache, cache_key = GoblinStyleDecomposer._cache_slot(
+                step_key, GoblinStyleDecomposer.STEP_CACHE_VARIANT, context
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            from external.anthropic_client import AnthropicClient
+            client = AnthropicClient()
+
+            if not client.is_available():
+                return None
+
+            prefix, prompt = GoblinStyleDecomposer.build_step_prompt_parts(
+                step_title, plan, task_description, context
+            )
+            text = client.send_message(prompt, max_tokens=1000, system_prompt=prefix)
+            if text is None:
+                return None
+
+            titles = GoblinStyleDecomposer._extract_lines(text)[:GoblinStyleDecomposer.MAX_MICRO_STEPS]
+            if not titles:
+                return None
+
+            labels = TitleClassifier.classify_many(titles)
+            children = [
+                GoblinStyleDecomposer._make_subtask(title, label)
+                for title, label in zip(titles, labels)
+            ]
+            if cache is not None:
+                cache.put(cache_key, children)
+            return children
+
+        except Exception as e:
+            print(f"⚠️ Erreur API: {e}")
+            return None
+
+    @staticmethod
+    def _find_subtask(subtasks: List[Dict], subtask_id: str) -> Optional[Dict]:
+        """Cherche une étape par id dans le plan et ses micro-étapes"""
+        for subtask in subtasks:
+            if subtask.get("id") == subtask_id:
+                return subtask
+            found = GoblinStyleDecomposer._find_subtask(subtask.get("children") or [], subtask_id)
+            if found is not None:
+                return found
+        return None
+
+    @staticmethod
+    def _get_fallback_micro_steps(subtask: Dict) -> List[Dict]:
+        """Micro-étapes génériques selon la catégorie de l'étape (mode hors ligne)"""
+        category = subtask.get("category") or TitleClassifier.classify(subtask["title"])["category"]
+        titles = GoblinStyleDecomposer.FALLBACK_MICRO_STEPS.get(
+            category, GoblinStyleDecomposer.FALLBACK_MICRO_STEPS["autre"]
+        )
+        labels = TitleClassifier.classify_many(titles)
+        return [
+            GoblinStyleDecomposer._make_subtask(title, label)
+            for title, label in zip(titles, labels)
+        ]
+
+    @staticmethod
+    def _subtasks_from_tree(tree: List[Dict], max_tasks: int) -> List[Dict]:
+        """
+        Décline un arbre en sous-tâches pour une limite d'étapes donnée
+
+        Les micro-étapes de l'arbre non retenues dans le plan restent sur
+        leur étape (subtask["children"]) : expand_subtask les sert sans
+        nouvel appel à l'API.
+        """
+        subtasks = GoblinStyleDecomposer._assign_ids(
+            GoblinStyleDecomposer._subtasks_from_nodes(PlanTree.select(tree, max_tasks))
+        )
+        for subtask in subtasks:
+            GoblinStyleDecomposer._number_children(subtask)
+        return subtasks
+
+    @staticmethod
+    def _subtasks_from_nodes(nodes: List[Dict]) -> List[Dict]:
+        """Sous-tâches (sans ids) d'une liste de nœuds d'arbre, micro-étapes comprises"""
+        labels = TitleClassifier.classify_many([node["title"] for node in nodes])
+        subtasks = []
+        for node, label in zip(nodes, labels):
+            subtask = GoblinStyleDecomposer._make_subtask(node["title"], label)
+            if node.get("children"):
+                subtask["children"] = GoblinStyleDecomposer._subtasks_from_nodes(node["children"])
+            subtasks.append(subtask)
+        return subtasks
+
+    @staticmethod
+    def _number_children(subtask: Dict):
+        """Donne aux micro-étapes les ids "<id parent>.1", "<id parent>.2"... (récursif)"""
+        for idx, child in enumerate(subtask.get("children") or [], 1):
+            child["id"] = f"{subtask['id']}.{idx}"
+            GoblinStyleDecomposer._number_children(child)
+
+    @staticmethod
+    def _get_cached_plan(
+        task_description: str,
+        spiciness: int,
+        context: Dict,
+        web_context: Dict = None
+    ) -> Optional[List[Dict]]:
+        """Retourne le plan en cache (arbre, sinon liste par spiciness), avec ids neufs, ou None"""
+        if HIERARCHICAL_DECOMPOSITION:
+            cache, cache_key = GoblinStyleDecomposer._cache_slot(
+                task_description, PlanTree.CACHE_VARIANT, context, web_context
+            )
+            tree = cache.get(cache_key)
+            if tree is not None:
+                max_tasks = SPICINESS_LEVELS.get(spiciness, SPICINESS_LEVELS[3])["max_subtasks"]
+                return GoblinStyleDecomposer._subtasks_from_tree(tree, max_tasks)
+            # Sinon, un plan à plat déjà diffusé par decompose_streaming
+
+        cache, cache_key = GoblinStyleDecomposer._cache_slot(
+            task_description, spiciness, context, web_context
+        )
+        cached = cache.get(cache_key)
+        if cached is None:
+            return None
+        return GoblinStyleDecomposer._assign_ids(cached)
+
+    @staticmethod
+    def _cache_slot(task_description: str, spiciness: int, context: Dict, web_context: Dict = None):
+        """Retourne (cache partagé, clé) pour une décomposition"""
+        from core.decomposition_cache import DecompositionCache
+        from core.task_analyzer import TaskAnalyzer
+
+        tier = TaskAnalyzer.get_level_tier(context.get("level", "premiere"))
+        cache_key = DecompositionCache.make_key(
+            task_description, spiciness, tier, context.get("subject"), web_context
+        )
+        return DecompositionCache.shared(), cache_key
 
     @staticmethod
     def build_spicy_prompt(
@@ -83,32 +658,140 @@ class GoblinStyleDecomposer:
         web_context: Dict = None
     ) -> str:
         """Construit un prompt enrichi par la recherche web"""
-        spicy_config = SPICINESS_LEVELS[spiciness]
-        level = context.get("level", "premiere")
-        web_context = web_context or {}
+        prefix, suffix = GoblinStyleDecomposer.build_spicy_prompt_parts(
+            task, context, spiciness, max_tasks, detail_mult, web_context
+        )
+        return f"{prefix}\n{suffix}"
 
+    @staticmethod
+    def build_spicy_prompt_parts(
+        task: str,
+        context: Dict,
+        spiciness: int,
+        max_tasks: int,
+        detail_mult: float,
+        web_context: Dict = None
+    ) -> Tuple[str, str]:
+        """
+        Construit le prompt en deux parties
+
+        Returns:
+            (instructions système stables par tier/spiciness,
+             suffixe propre à la tâche)
+        """
         # Déterminer le tier éducatif
         from core.task_analyzer import TaskAnalyzer
-        tier = TaskAnalyzer.get_level_tier(level)
-        tier_labels = {"college": "COLLÈGE", "lycee": "LYCÉE", "universite": "UNIVERSITÉ"}
-        tier_label = tier_labels.get(tier, "LYCÉE")
+        tier = TaskAnalyzer.get_level_tier(context.get("level", "premiere"))
 
-        base_instructions = f"""Tu es un EXPERT en décomposition de tâches pour personnes TDAH.
+        prefix = GoblinStyleDecomposer._get_prompt_prefix(tier, spiciness, max_tasks)
+        suffix = GoblinStyleDecomposer._build_task_block(task, context, web_context) + """
 
-🌶️ NIVEAU DE DÉTAIL : {spicy_config['label']} ({spicy_config['emoji']})
-{spicy_config['description']}
+RÉPONDS UNIQUEMENT avec la liste numérotée :
+"1. [ACTION]"
 
-🎓 NIVEAU SCOLAIRE : {tier_label} ({level.upper()})
+NE METS RIEN D'AUTRE."""
+
+        return prefix, suffix
+
+    @staticmethod
+    def build_tree_prompt_parts(task: str, context: Dict, web_context: Dict = None) -> Tuple[str, str]:
+        """
+        Construit le prompt du plan hiérarchique (étapes + micro-étapes)
 
-📚 ADAPTATION OBLIGATOIRE AU NIVEAU SCOLAIRE :"""
+        Returns:
+            (instructions système stables par tier, suffixe propre à la tâche)
+        """
+        from core.task_analyzer import TaskAnalyzer
+        tier = TaskAnalyzer.get_level_tier(context.get("level", "premiere"))
+
+        prefix = GoblinStyleDecomposer._get_tree_prompt_prefix(tier)
+        suffix = GoblinStyleDecomposer._build_task_block(task, context, web_context) + """
+
+RÉPONDS UNIQUEMENT avec la liste numérotée sur deux niveaux :
+"1. [ÉTAPE PRINCIPALE]
+   1.1 [MICRO-ÉTAPE]
+   1.2 [MICRO-ÉTAPE]
+2. [ÉTAPE PRINCIPALE]
+   2.1 [MICRO-ÉTAPE]"
+
+NE METS RIEN D'AUTRE."""
+
+        return prefix, suffix
+
+    @staticmethod
+    def build_step_prompt_parts(
+        step_title: str,
+        plan: List[Dict],
+        task_description: str,
+        context: Dict
+    ) -> Tuple[str, str]:
+        """
+        Construit le prompt de découpage d'une seule étape
+
+        Returns:
+            (instructions système stables par tier,
+             suffixe : tâche, plan complet et étape visée)
+        """
+        from core.task_analyzer import TaskAnalyzer
+        tier = TaskAnalyzer.get_level_tier(context.get("level", "premiere"))
+
+        prefix = GoblinStyleDecomposer._get_step_prompt_prefix(tier)
+
+        plan_lines = "\n".join(
+            f"{'👉' if subtask.get('title') == step_title else '  '} {idx}. {subtask.get('title', '')}"
+            for idx, subtask in enumerate(plan, 1)
+        )
+
+        suffix = f"""
+📚 MATIÈRE : {context.get('subject', 'autre').upper()}
+🎓 NIVEAU : {context.get('level', 'autre').upper()}
 
-        # Instructions spécifiques au niveau scolaire
+📋 TÂCHE D'ORIGINE :
+"{task_description or step_title}"
+
+🗺️ PLAN EN COURS :
+{plan_lines}
+
+🧱 ÉTAPE À DÉCOUPER :
+"{step_title}"
+
+RÉPONDS UNIQUEMENT avec la liste numérotée :
+"1. [MICRO-ACTION]"
+
+NE METS RIEN D'AUTRE."""
+
+        return prefix, suffix
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_step_prompt_prefix(tier: str) -> str:
+        """Partie fixe du prompt de découpage d'étape, calculée une fois par tier"""
+        tier_label = GoblinStyleDecomposer.TIER_LABELS.get(tier, "LYCÉE")
         school_instructions = GoblinStyleDecomposer._get_school_instructions(tier)
-        base_instructions += school_instructions
+
+        return f"""Tu es un EXPERT en décomposition de tâches pour personnes TDAH.
+L'élève BLOQUE sur une étape de son plan : découpe UNIQUEMENT cette étape.
+
+🎓 NIVEAU SCOLAIRE : {tier_label}
+
+📚 ADAPTATION OBLIGATOIRE AU NIVEAU SCOLAIRE :{school_instructions}
+🎯 RÈGLES ABSOLUES :
+1. {GoblinStyleDecomposer.MAX_MICRO_STEPS} MICRO-ÉTAPES maximum, de 5 min chacune
+2. UN verbe d'action au début
+3. Rester dans le périmètre de l'étape (pas d'étape voisine du plan)
+4. Phrases courtes (10 mots max)
+5. La première micro-étape doit être très facile à lancer
+"""
+
+    @staticmethod
+    def _build_task_block(task: str, context: Dict, web_context: Dict = None) -> str:
+        """Partie variable du prompt : recherches web, matière, urgence et tâche"""
+        web_context = web_context or {}
 
         # Ajout des informations web si disponibles
+        web_info = ""
         if web_context.get("found_resources"):
-            web_info = "\n\n🔍 MÉTHODOLOGIE SPÉCIFIQUE (basée sur recherches) :\n"
+            web_info = "\n🔍 MÉTHODOLOGIE SPÉCIFIQUE (basée sur recherches) :\n"
 
             key_concepts = web_context.get("key_concepts", [])
             if key_concepts:
@@ -126,11 +809,6 @@ class GoblinStyleDecomposer:
                 for mistake in mistakes[:3]:
                     web_info += f"⚠️ {mistake}\n"
 
-            base_instructions += web_info
-
-        # Instructions de détail
-        detail_instruction = GoblinStyleDecomposer._get_detail_instructions(spiciness, max_tasks)
-
         subject_instr = ""
         if context.get("subject") == "maths":
             subject_instr = "\n📐 MATHS : Séparer calculs / vérification / correction"
@@ -141,18 +819,58 @@ class GoblinStyleDecomposer:
         if context.get("time_constraint") == "urgent":
             urgency = "\n⚠️ URGENT : Prioriser l'essentiel, pas de détails superflus"
 
-        prompt = f"""{base_instructions}
-
-{detail_instruction}
-{subject_instr}
-{urgency}
+        return f"""{web_info}{subject_instr}{urgency}
 
 📚 MATIÈRE : {context.get('subject', 'autre').upper()}
 🎯 TYPE : {context.get('type', 'autre').upper()}
 🎓 NIVEAU : {context.get('level', 'autre').upper()}
 
 📋 TÂCHE À DÉCOMPOSER :
-"{task}"
+"{task}\""""
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_tree_prompt_prefix(tier: str) -> str:
+        """Partie fixe du prompt hiérarchique, calculée une fois par tier"""
+        tier_label = GoblinStyleDecomposer.TIER_LABELS.get(tier, "LYCÉE")
+        school_instructions = GoblinStyleDecomposer._get_school_instructions(tier)
+
+        return f"""Tu es un EXPERT en décomposition de tâches pour personnes TDAH.
+
+🎓 NIVEAU SCOLAIRE : {tier_label}
+
+📚 ADAPTATION OBLIGATOIRE AU NIVEAU SCOLAIRE :{school_instructions}
+🌳 PLAN HIÉRARCHIQUE :
+- EXACTEMENT 3 étapes PRINCIPALES, dans l'ordre logique
+- Chaque étape principale découpée en 3 à 4 MICRO-ÉTAPES
+- Une micro-étape détaille son étape principale sans la répéter
+
+🎯 RÈGLES ABSOLUES :
+1. UN verbe d'action au début de chaque ligne
+2. Quantités précises (pages, exercices, minutes)
+3. Phrases courtes (10 mots max)
+4. Ordre logique progressif
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_prompt_prefix(tier: str, spiciness: int, max_tasks: int) -> str:
+        """Partie fixe du prompt, calculée une fois par (tier, spiciness, max_tasks)"""
+        spicy_config = SPICINESS_LEVELS[spiciness]
+        tier_label = GoblinStyleDecomposer.TIER_LABELS.get(tier, "LYCÉE")
+
+        school_instructions = GoblinStyleDecomposer._get_school_instructions(tier)
+        detail_instruction = GoblinStyleDecomposer._get_detail_instructions(spiciness, max_tasks)
+
+        return f"""Tu es un EXPERT en décomposition de tâches pour personnes TDAH.
+
+🌶️ NIVEAU DE DÉTAIL : {spicy_config['label']} ({spicy_config['emoji']})
+{spicy_config['description']}
+
+🎓 NIVEAU SCOLAIRE : {tier_label}
+
+📚 ADAPTATION OBLIGATOIRE AU NIVEAU SCOLAIRE :{school_instructions}
+{detail_instruction}
 
 🎯 RÈGLES ABSOLUES :
 1. EXACTEMENT {max_tasks} étapes maximum (pas plus !)
@@ -160,13 +878,7 @@ class GoblinStyleDecomposer:
 3. Quantités précises (pages, exercices, minutes)
 4. Phrases courtes (10 mots max)
 5. Ordre logique progressif
-
-RÉPONDS UNIQUEMENT avec la liste numérotée :
-"1. [ACTION]"
-
-NE METS RIEN D'AUTRE."""
-
-        return prompt
+"""
 
     @staticmethod
     def _get_school_instructions(tier: str) -> str:
@@ -333,28 +1045,55 @@ NE METS RIEN D'AUTRE."""
     @staticmethod
     def parse_response(text: str, original_task: str, context: Dict, max_tasks: int) -> List[Dict]:
         """Parse la réponse de l'IA"""
-        lines = [
-            re.sub(r'^\d+\.\s*', '', line.strip())
-            for line in text.split('\n')
-            if re.match(r'^\d+\.', line.strip())
-        ]
+        lines = GoblinStyleDecomposer._extract_lines(text)
 
         if not lines:
             return GoblinStyleDecomposer.get_fallback_with_spiciness(original_task, context, 3)
 
         lines = lines[:max_tasks]
 
-        return [
-            {
-                "id": f"task-{int(time.time() * 1000)}-{idx}",
-                "title": title,
-                "category": SmartTaskDecomposer.detect_category(title),
-                "difficulty": SmartTaskDecomposer.detect_difficulty(title),
-                "estimatedTime": 0,
-                "completed": False
-            }
-            for idx, title in enumerate(lines)
-        ]
+        # Toutes les étapes sont étiquetées en un seul passage
+        labels = TitleClassifier.classify_many(lines)
+
+        return GoblinStyleDecomposer._assign_ids([
+            GoblinStyleDecomposer._make_subtask(title, label)
+            for title, label in zip(lines, labels)
+        ])
+
+    @staticmethod
+    def _make_subtask(title: str, label: Dict = None) -> Dict:
+        """Construit une sous-tâche (sans id) à partir de son titre"""
+        label = label or TitleClassifier.classify(title)
+        return {
+            "title": title,
+            "category": label["category"],
+            "difficulty": label["difficulty"],
+            "estimatedTime": 0,
+            "completed": False
+        }
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[str]:
+        """Retourne le titre d'une ligne numérotée « 1. ... », sinon None"""
+        line = line.strip()
+        if not re.match(r'^\d+\.', line):
+            return None
+        return re.sub(r'^\d+\.\s*', '', line)
+
+    @staticmethod
+    def _extract_lines(text: str) -> List[str]:
+        """Extrait les titres des lignes numérotées « 1. ... » de la réponse"""
+        titles = (GoblinStyleDecomposer._parse_line(line) for line in text.split('\n'))
+        return [title for title in titles if title is not None]
+
+    @staticmethod
+    def _assign_ids(subtasks: List[Dict]) -> List[Dict]:
+        """Attribue des ids neufs (en place) et place l'id en premier champ"""
+        stamp = int(time.time() * 1000)
+        for idx, subtask in enumerate(subtasks):
+            subtask.pop("id", None)
+            subtasks[idx] = {"id": f"task-{stamp}-{idx}", **subtask}
+        return subtasks
 
 
 class SmartTaskDecomposer:
@@ -370,37 +1109,20 @@ class SmartTaskDecomposer:
     @staticmethod
     def detect_category(title: str) -> str:
         """Détecte la catégorie d'une tâche"""
-        lower_title = title.lower()
-
-        for category, config in CATEGORY_CONFIG.items():
-            if any(keyword in lower_title for keyword in config["keywords"]):
-                return category
-
-        return "autre"
+        return TitleClassifier.classify(title)["category"]
 
     @staticmethod
     def detect_difficulty(title: str) -> str:
         """Détecte la difficulté d'une tâche"""
-        lower_title = title.lower()
-
-        easy_keywords = ['lire', 'relire', 'noter', 'recopier', 'chercher', 'rassembler', 'surligner']
-        hard_keywords = ['rédiger', 'créer', 'analyser', 'complexe', 'difficile', 'développer', 'argumenter']
-
-        if any(word in lower_title for word in hard_keywords):
-            return 'hard'
-        if any(word in lower_title for word in easy_keywords):
-            return 'easy'
-
-        return 'medium'
+        return TitleClassifier.classify(title)["difficulty"]
 
     @staticmethod
     def auto_categorize_with_emoji(task_title: str) -> Dict:
         """Catégorisation automatique avancée avec emojis"""
-        category = SmartTaskDecomposer.detect_category(task_title)
-        config = CATEGORY_CONFIG.get(category, CATEGORY_CONFIG["autre"])
+        label = TitleClassifier.classify(task_title)
 
         return {
-            "category": category,
-            "emoji": config["emoji"],
-            "color": config["color"]
+            "category": label["category"],
+            "emoji": label["emoji"],
+            "color": label["color"]
         }
@@ -0,0 +1,301 @@
+"""
+Planificateur de semaine - Répartit les plans de devoirs en créneaux Pomodoro
+Échéance la plus proche d'abord, sur les heures les plus productives de l'élève.
+"""
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import (
+    ACTIVITY_TOP_K,
+    SCHEDULER_SESSION_MINUTES,
+    SCHEDULER_HORIZON_DAYS,
+    SCHEDULER_DEFAULT_DEADLINE_DAYS
+)
+from config.tdah_rules import POMODORO_PROFILES
+
+
+class HomeworkScheduler:
+    """
+    Planifie plusieurs plans décomposés sur la semaine (ou le trimestre).
+
+    - Créneaux : une séance de SCHEDULER_SESSION_MINUTES à chacune des
+      meilleures heures de l'élève, découpée en pomodoros travail / pause
+    - Ordre : tas de priorité sur l'échéance (earliest deadline first),
+      les étapes d'un même plan restant dans leur ordre
+    - Replanifier après une séance manquée ne recalcule que le travail
+      restant : O((n + créneaux) log n), quelques millisecondes pour un trimestre
+
+    Exemple:
+        scheduler = HomeworkScheduler(personalization)
+        plan = scheduler.add_plan("Exercices de maths pour demain", subtasks)
+        planning = scheduler.schedule()
+        ...
+        scheduler.mark_done(plan["id"], subtask_id)
+        planning = scheduler.reschedule()
+    """
+
+    WEEKDAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+
+    # Plus petit morceau d'étape planifié (évite les fragments d'une minute)
+    MIN_PIECE_MINUTES = 5
+
+    # Échéance selon TaskAnalyzer.detect_time_constraint (en jours, à minuit)
+    CONSTRAINT_DEADLINE_DAYS = {
+        "urgent": 1,
+        "long_terme": 30
+    }
+
+    def __init__(self, personalization=None, pomodoro_profile: str = None):
+        """
+        Args:
+            personalization: Instance de UserPersonalization (défaut: instance partagée)
+            pomodoro_profile: Clé de POMODORO_PROFILES (défaut: selon focus_duration)
+        """
+        if personalization is None:
+            from core.personalization import UserPersonalization
+            personalization = UserPersonalization.shared()
+
+        self.personalization = personalization
+        self.work_minutes, self.pause_minutes = self._resolve_pomodoro(pomodoro_profile)
+        self.plans: List[Dict] = []
+
+    def _resolve_pomodoro(self, pomodoro_profile: Optional[str]) -> Tuple[int, int]:
+        """Retourne (minutes de travail, minutes de pause) d'un pomodoro"""
+        if pomodoro_profile in POMODORO_PROFILES:
+            profile = POMODORO_PROFILES[pomodoro_profile]
+            return profile["work"], profile["pause"]
+
+        # Durée de focus de l'élève, pause du profil le plus proche
+        work = self.personalization.focus_duration
+        closest = min(POMODORO_PROFILES.values(), key=lambda profile: abs(profile["work"] - work))
+        return work, closest["pause"]
+
+    # ========================================
+    # PLANS ET ÉCHÉANCES
+    # ========================================
+
+    def add_plan(
+        self,
+        task: str,
+        subtasks: List[Dict],
+        deadline: datetime = None,
+        now: datetime = None
+    ) -> Dict:
+        """
+        Ajoute un plan décomposé à planifier
+
+        Args:
+            task: Description de la tâche (sert à déduire l'échéance)
+            subtasks: Étapes du plan (id, title, category, difficulty...)
+            deadline: Échéance explicite (sinon déduite de la description)
+            now: Date de référence pour l'échéance déduite
+
+        Returns:
+            Le plan enregistré, avec son id, ses durées estimées et son échéance
+        """
+        estimates = self.personalization.estimate_plan(subtasks)["estimates"]
+
+        plan = {
+            # Les ids d'étapes ne sont uniques qu'au sein d'un plan (task-<ms>-N)
+            "id": len(self.plans),
+            "task": task,
+            "deadline": deadline or self.resolve_deadline(task, now),
+            "subtasks": subtasks,
+            "minutes": estimates
+        }
+        self.plans.append(plan)
+        return plan
+
+    @classmethod
+    def resolve_deadline(cls, task: str, now: datetime = None) -> datetime:
+        """
+        Déduit l'échéance d'une tâche de sa description
+
+        Un jour nommé ("pour vendredi") donne le début de ce jour ; sinon la
+        contrainte de TaskAnalyzer.detect_time_constraint est utilisée.
+        """
+        from core.task_analyzer import TaskAnalyzer
+
+        now = now or datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        task_lower = task.lower()
+
+        for weekday, name in enumerate(cls.WEEKDAYS):
+            if name in task_lower:
+                days_ahead = (weekday - today.weekday()) % 7 or 7
+                return today + timedelta(days=days_ahead)
+
+        constraint = TaskAnalyzer.detect_time_constraint(task_lower)
+        if constraint == "cette_semaine":
+            # Fin de la semaine en cours (lundi suivant, minuit)
+            return today + timedelta(days=7 - today.weekday())
+
+        days = cls.CONSTRAINT_DEADLINE_DAYS.get(constraint, SCHEDULER_DEFAULT_DEADLINE_DAYS)
+        return today + timedelta(days=days)
+
+    def mark_done(self, plan_id: int, subtask_id: str) -> bool:
+        """
+        Marque une étape comme terminée (elle ne sera plus planifiée)
+
+        Args:
+            plan_id: Id du plan (add_plan, ou "plan_id" d'une entrée du planning)
+            subtask_id: Id de l'étape dans ce plan
+        """
+        if not 0 <= plan_id < len(self.plans):
+            return False
+
+        for subtask in self.plans[plan_id]["subtasks"]:
+            if subtask.get("id") == subtask_id:
+                subtask["completed"] = True
+                return True
+        return False
+
+    # ========================================
+    # PLANIFICATION
+    # ========================================
+
+    def schedule(self, start: datetime = None) -> Dict:
+        """
+        Répartit tout le travail restant à partir de `start`
+
+        Returns:
+            {
+                "entries": [{"type": "work", "start", "end", "minutes", "task",
+                             "plan_id", "subtask_id", "title"} ou {"type": "pause", ...}],
+                "late": [tâches dont une étape finit après l'échéance],
+                "unscheduled": [tâches restées incomplètes dans l'horizon],
+                "total_minutes": minutes de travail planifiées
+            }
+            (dates au format ISO)
+        """
+        start = start or datetime.now()
+
+        # File de priorité : (échéance, indice du plan = ordre d'ajout)
+        queue = []
+        progress = []
+        for index, plan in enumerate(self.plans):
+            remaining = [
+                [position, minutes]
+                for position, (subtask, minutes) in enumerate(zip(plan["subtasks"], plan["minutes"]))
+                if not subtask.get("completed") and minutes > 0
+            ]
+            progress.append(remaining)
+            if remaining:
+                queue.append((plan["deadline"], index))
+        heapq.heapify(queue)
+
+        entries = []
+        late = set()
+        total = 0
+
+        for work_start, work_end, pause_end in self._iter_slots(start):
+            if not queue:
+                break
+
+            cursor = work_start
+            # Plans dont l'étape ne tient pas dans la fin de ce pomodoro
+            deferred = []
+            while queue and cursor < work_end:
+                deadline, index = queue[0]
+                plan = self.plans[index]
+                remaining = progress[index]
+                position, minutes = remaining[0]
+
+                room = int((work_end - cursor).total_seconds() // 60)
+                if minutes <= room:
+                    piece = minutes
+                else:
+                    # Étape coupée : chaque morceau garde au moins MIN_PIECE_MINUTES
+                    piece = min(room, minutes - self.MIN_PIECE_MINUTES)
+                    if piece < self.MIN_PIECE_MINUTES:
+                        if cursor > work_start:
+                            # Ce plan attend le pomodoro suivant, les autres finissent celui-ci
+                            deferred.append(heapq.heappop(queue))
+                            continue
+                        # Pomodoro trop court pour respecter le minimum : il est rempli en entier
+                        piece = room
+                piece_end = cursor + timedelta(minutes=piece)
+                subtask = plan["subtasks"][position]
+
+                entries.append({
+                    "type": "work",
+                    "start": cursor.isoformat(),
+                    "end": piece_end.isoformat(),
+                    "minutes": piece,
+                    "task": plan["task"],
+                    "plan_id": plan["id"],
+                    "subtask_id": subtask.get("id"),
+                    "title": subtask.get("title", "")
+                })
+                if piece_end > deadline:
+                    late.add(index)
+
+                total += piece
+                cursor = piece_end
+                remaining[0][1] -= piece
+                if remaining[0][1] <= 0:
+                    remaining.pop(0)
+                    if not remaining:
+                        heapq.heappop(queue)
+
+            for item in deferred:
+                heapq.heappush(queue, item)
+
+            if cursor > work_start and pause_end > work_end:
+                entries.append({
+                    "type": "pause",
+                    "start": work_end.isoformat(),
+                    "end": pause_end.isoformat(),
+                    "minutes": int((pause_end - work_end).total_seconds() // 60)
+                })
+
+        return {
+            "entries": entries,
+            "late": [self.plans[index]["task"] for index in sorted(late)],
+            "unscheduled": [self.plans[index]["task"] for _, index in sorted(queue)],
+            "total_minutes": total
+        }
+
+    def reschedule(self, now: datetime = None) -> Dict:
+        """Replanifie le travail restant après une séance manquée ou terminée"""
+        return self.schedule(now or datetime.now())
+
+    def _iter_slots(self, start: datetime) -> Iterator[Tuple[datetime, datetime, datetime]]:
+        """
+        Génère les pomodoros (début travail, fin travail, fin pause) dans l'ordre
+
+        Une séance commence à l'une des meilleures heures de l'élève pour ce
+        jour de la semaine ; une séance déjà commencée à `start` est ignorée.
+        """
+        hours_by_day = self._get_session_hours()
+        session = timedelta(minutes=SCHEDULER_SESSION_MINUTES)
+        work = timedelta(minutes=self.work_minutes)
+        pause = timedelta(minutes=self.pause_minutes)
+        first_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        for day_offset in range(SCHEDULER_HORIZON_DAYS):
+            day = first_day + timedelta(days=day_offset)
+
+            for hour in hours_by_day[day.weekday()]:
+                session_start = day + timedelta(hours=hour)
+                if session_start < start:
+                    continue
+
+                session_end = session_start + session
+                work_start = session_start
+                while work_start + work <= session_end:
+                    work_end = work_start + work
+                    pause_end = min(work_end + pause, session_end)
+                    yield work_start, work_end, pause_end
+                    work_start = work_end + pause
+
+    def _get_session_hours(self) -> List[List[int]]:
+        """Heures de début de séance pour chaque jour (0 = lundi)"""
+        default_hours = sorted(self.personalization.get_best_hours(3))
+        hours_by_day = [[] for _ in range(7)]
+
+        for weekday, hour in self.personalization.get_best_slots(ACTIVITY_TOP_K):
+            hours_by_day[weekday].append(hour)
+
+        return [sorted(hours) if hours else default_hours for hours in hours_by_day]
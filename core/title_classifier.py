@@ -0,0 +1,151 @@
+"""
+Classifieur de titres - Catégorie, difficulté, emoji et couleur des sous-tâches
+Toutes les règles sont compilées une fois en une seule expression régulière.
+"""
+import re
+from typing import Dict, List, Pattern, Tuple
+
+from config.tdah_rules import CATEGORY_CONFIG
+
+
+class TitleClassifier:
+    """
+    Étiquette une liste de titres de sous-tâches en un seul passage.
+
+    Règles (identiques à SmartTaskDecomposer) :
+    - catégorie : première catégorie de CATEGORY_CONFIG dont un mot-clé
+      apparaît dans le titre, sinon "autre"
+    - difficulté : "hard" si un mot difficile apparaît, sinon "easy" si un
+      mot facile apparaît, sinon "medium"
+    """
+
+    EASY_KEYWORDS = ['lire', 'relire', 'noter', 'recopier', 'chercher', 'rassembler', 'surligner']
+    HARD_KEYWORDS = ['rédiger', 'créer', 'analyser', 'complexe', 'difficile', 'développer', 'argumenter']
+
+    # (expression compilée, catégories, étiquettes par groupe) - voir _get_rules
+    _rules = None
+
+    @classmethod
+    def _get_rules(cls) -> Tuple[Pattern, List[str], Dict[str, Tuple[int, bool, bool]]]:
+        """
+        Compile une fois tous les mots-clés en une seule expression
+
+        Les mots-clés sont factorisés en arbre de préfixes (un seul essai par
+        caractère au lieu d'un essai par mot-clé) et placés dans un lookahead :
+        un seul finditer trouve toutes les occurrences, y compris celles qui se
+        chevauchent. À chaque position, le mot retenu est le plus long ; ses
+        étiquettes incluent celles des mots-clés plus courts qui en sont des
+        préfixes, trouvés à la même position.
+
+        Returns:
+            (expression compilée, noms des catégories,
+             {mot-clé: (indice de catégorie, difficile, facile)})
+        """
+        if cls._rules is None:
+            categories = list(CATEGORY_CONFIG)
+            no_category = len(categories)
+
+            # Étiquettes propres à chaque mot-clé
+            own = {}
+            for index, category in enumerate(categories):
+                for keyword in CATEGORY_CONFIG[category]["keywords"]:
+                    cat, hard, easy = own.get(keyword, (no_category, False, False))
+                    own[keyword] = (min(cat, index), hard, easy)
+            for keyword in cls.HARD_KEYWORDS:
+                cat, _, easy = own.get(keyword, (no_category, False, False))
+                own[keyword] = (cat, True, easy)
+            for keyword in cls.EASY_KEYWORDS:
+                cat, hard, _ = own.get(keyword, (no_category, False, False))
+                own[keyword] = (cat, hard, True)
+
+            labels = {}
+            for keyword in own:
+                # Un mot trouvé implique tous les mots-clés qui en sont des préfixes
+                implied = [label for other, label in own.items() if keyword.startswith(other)]
+                labels[keyword] = (
+                    min(label[0] for label in implied),
+                    any(label[1] for label in implied),
+                    any(label[2] for label in implied)
+                )
+
+            pattern = re.compile("(?=(" + cls.trie_pattern(list(own)) + "))")
+            cls._rules = (pattern, categories, labels)
+
+        return cls._rules
+
+    @staticmethod
+    def trie_pattern(words: List[str]) -> str:
+        """Expression régulière équivalente à l'alternance des mots, factorisée par préfixes"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # Fin de mot possible ici : la suite est facultative (gourmande = mot le plus long)
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    @classmethod
+    def classify_many(cls, titles: List[str]) -> List[Dict]:
+        """
+        Étiquette une liste de titres
+
+        Args:
+            titles: Titres des sous-tâches
+
+        Returns:
+            Pour chaque titre : {"category", "difficulty", "emoji", "color"}
+        """
+        pattern, categories, labels = cls._get_rules()
+        no_category = len(categories)
+
+        lowered = [title.lower() for title in titles]
+        # Fin (exclue) de chaque titre dans le texte joint
+        ends = []
+        position = 0
+        for title in lowered:
+            position += len(title)
+            ends.append(position)
+            position += 1
+
+        best_category = [no_category] * len(titles)
+        hard = [False] * len(titles)
+        easy = [False] * len(titles)
+
+        # Aucun mot-clé ne contient de retour à la ligne : pas de faux positif entre deux titres
+        line = 0
+        for match in pattern.finditer("\n".join(lowered)):
+            start = match.start()
+            while start >= ends[line]:
+                line += 1
+
+            category, is_hard, is_easy = labels[match.group(1)]
+            if category < best_category[line]:
+                best_category[line] = category
+            hard[line] = hard[line] or is_hard
+            easy[line] = easy[line] or is_easy
+
+        results = []
+        for index in range(len(titles)):
+            category = categories[best_category[index]] if best_category[index] < no_category else "autre"
+            config = CATEGORY_CONFIG.get(category, CATEGORY_CONFIG["autre"])
+            results.append({
+                "category": category,
+                "difficulty": "hard" if hard[index] else "easy" if easy[index] else "medium",
+                "emoji": config["emoji"],
+                "color": config["color"]
+            })
+        return results
+
+    @classmethod
+    def classify(cls, title: str) -> Dict:
+        """Étiquette un seul titre (voir classify_many)"""
+        return cls.classify_many([title])[0]
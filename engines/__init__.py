@@ -1,6 +1,19 @@
 # Pedagogical engines module
 from .base import SubjectEngine, SubjectEngineFactory
-from .maths import MathsEngine
-from .history import HistoryEngine
-from .science import ScienceEngine
-from .language import LanguageEngine
+
+# Les moteurs par matière sont importés au premier accès (voir SubjectEngineFactory)
+_LAZY_ENGINES = {
+    "MathsEngine": ".maths",
+    "HistoryEngine": ".history",
+    "ScienceEngine": ".science",
+    "LanguageEngine": ".language",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ENGINES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+    return getattr(import_module(module_name, __name__), name)
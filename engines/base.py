@@ -1,7 +1,12 @@
 """
 Moteur pédagogique de base - Classe parent pour tous les moteurs par matière
 """
-from typing import Dict, List
+import importlib
+import importlib.util
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
 
 from config.tdah_rules import SCHOOL_LEVELS
 
@@ -9,6 +14,21 @@ from config.tdah_rules import SCHOOL_LEVELS
 class SubjectEngine:
     """Classe de base pour les moteurs pédagogiques par matière"""
 
+    # Fichier de corpus data/corpus/<CORPUS>.json du moteur (None = aucun)
+    CORPUS = None
+
+    # Place des tâches de l'élève dans PHASES
+    ORIGINAL_TASKS = "taches_originales"
+
+    # Phases d'adaptation du moteur, dans l'ordre : ORIGINAL_TASKS ou
+    # {tier: [(titre, catégorie, difficulté, minutes)]}, "*" = autres tiers
+    PHASES: List = []
+
+    # (classe du moteur, tier) -> (tâches avant, tâches après), immuables
+    _templates: Dict[Tuple[type, str], Tuple[Tuple[Mapping, ...], Tuple[Mapping, ...]]] = {}
+    # (classe du moteur, niveau) -> modèle de son tier (évite de recalculer le tier)
+    _level_templates: Dict[Tuple[type, str], Tuple[Tuple[Mapping, ...], Tuple[Mapping, ...]]] = {}
+
     @staticmethod
     def get_level_tier(level: str) -> str:
         """Retourne le tier éducatif (college/lycee/universite)"""
@@ -33,6 +53,54 @@ class SubjectEngine:
         """Adapte les tâches selon la matière et le niveau (à surcharger)"""
         return tasks
 
+    @classmethod
+    def get_template(cls, tier: str) -> Tuple[Tuple[Mapping, ...], Tuple[Mapping, ...]]:
+        """
+        Compile une fois les PHASES du moteur pour un tier
+
+        Returns:
+            (tâches placées avant celles de l'élève, tâches placées après),
+            en lecture seule : apply_template en donne des copies
+        """
+        key = (cls, tier)
+        template = SubjectEngine._templates.get(key)
+        if template is None:
+            before, after = [], []
+            current = before
+            for phase in cls.PHASES:
+                if phase == SubjectEngine.ORIGINAL_TASKS:
+                    current = after
+                    continue
+                for title, category, difficulty, time in phase.get(tier, phase.get("*", [])):
+                    current.append(MappingProxyType(SubjectEngine.create_task(title, category, difficulty, time)))
+
+            template = (tuple(before), tuple(after))
+            SubjectEngine._templates[key] = template
+        return template
+
+    @classmethod
+    def apply_template(cls, tasks: List[Dict], level: str) -> List[Dict]:
+        """
+        Insère les tâches de l'élève dans le modèle compilé de son niveau
+
+        Les tâches du modèle sont copiées (chaque plan modifie son propre
+        'completed'), les tâches de l'élève sont reprises telles quelles.
+        """
+        template = SubjectEngine._level_templates.get((cls, level))
+        if template is None:
+            template = cls.get_template(SubjectEngine.get_level_tier(level))
+            SubjectEngine._level_templates[(cls, level)] = template
+        before, after = template
+
+        for task in tasks:
+            if "completed" not in task:
+                task["completed"] = False
+
+        adapted = [task.copy() for task in before]
+        adapted.extend(tasks)
+        adapted.extend([task.copy() for task in after])
+        return adapted
+
     @staticmethod
     def ensure_completed_field(tasks: List[Dict]) -> List[Dict]:
         """S'assure que toutes les tâches ont le champ 'completed'"""
@@ -43,40 +111,115 @@ class SubjectEngine:
 
 
 class SubjectEngineFactory:
-    """Factory pour obtenir le bon moteur selon la matière"""
+    """
+    Registre des moteurs : une instance partagée par matière (les moteurs
+    sont sans état), module importé au premier usage de la matière.
+
+    Ordre de résolution d'une matière :
+    1. moteur enregistré via register_engine()
+    2. moteur intégré (BUILTIN_ENGINES)
+    3. plugin engines/plugins/<matière>.py exposant ENGINE = <classe>
+    4. SubjectEngine générique
+    """
 
-    _engines = {}
+    # Moteurs intégrés, importés seulement quand leur matière est demandée
+    BUILTIN_ENGINES = {
+        "maths": "engines.maths:MathsEngine",
+        "histoire": "engines.history:HistoryEngine",
+        "géographie": "engines.history:HistoryEngine",
+        "anglais": "engines.language:LanguageEngine",
+        "espagnol": "engines.language:LanguageEngine",
+        "allemand": "engines.language:LanguageEngine",
+        "français": "engines.language:LanguageEngine",
+        "physique": "engines.science:ScienceEngine",
+        "chimie": "engines.science:ScienceEngine",
+        "svt": "engines.science:ScienceEngine",
+    }
+
+    PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+
+    _engines = {}    # Classes enregistrées explicitement
+    _instances = {}  # Matière -> instance partagée
+    _plugins = None  # Matière -> fichier plugin (dossier lu une seule fois)
+    _lock = threading.RLock()
 
     @classmethod
     def register_engine(cls, subject: str, engine_class):
-        """Enregistre un moteur pour une matière"""
-        cls._engines[subject] = engine_class
+        """Enregistre un moteur pour une matière (prioritaire sur les moteurs intégrés)"""
+        with cls._lock:
+            cls._engines[subject] = engine_class
+            cls._instances.pop(subject, None)
 
     @classmethod
     def get_engine(cls, subject: str) -> SubjectEngine:
         """Retourne le moteur approprié pour la matière"""
-        # Import tardif pour éviter les imports circulaires
-        if not cls._engines:
-            from .maths import MathsEngine
-            from .history import HistoryEngine
-            from .science import ScienceEngine
-            from .language import LanguageEngine
-
-            cls._engines = {
-                "maths": MathsEngine,
-                "histoire": HistoryEngine,
-                "géographie": HistoryEngine,
-                "anglais": LanguageEngine,
-                "espagnol": LanguageEngine,
-                "allemand": LanguageEngine,
-                "français": LanguageEngine,
-                "physique": ScienceEngine,
-                "chimie": ScienceEngine,
-                "svt": ScienceEngine,
-            }
-
-        engine_class = cls._engines.get(subject, SubjectEngine)
-        return engine_class()
+        engine = cls._instances.get(subject)
+        if engine is not None:
+            return engine
+
+        with cls._lock:
+            engine = cls._instances.get(subject)
+            if engine is None:
+                engine = cls._resolve_engine_class(subject)()
+                cls._instances[subject] = engine
+            return engine
+
+    @classmethod
+    def available_subjects(cls) -> List[str]:
+        """Matières ayant un moteur dédié (sans importer les moteurs)"""
+        subjects = set(cls.BUILTIN_ENGINES) | set(cls._engines) | set(cls._discover_plugins())
+        return sorted(subjects)
+
+    @classmethod
+    def _resolve_engine_class(cls, subject: str):
+        """Trouve la classe du moteur d'une matière (import tardif)"""
+        if subject in cls._engines:
+            return cls._engines[subject]
+
+        target = cls.BUILTIN_ENGINES.get(subject)
+        if target:
+            # Import tardif pour éviter les imports circulaires
+            module_name, class_name = target.split(":")
+            return getattr(importlib.import_module(module_name), class_name)
+
+        plugin_file = cls._discover_plugins().get(subject)
+        if plugin_file:
+            engine_class = cls._load_plugin(subject, plugin_file)
+            if engine_class is not None:
+                return engine_class
+
+        return SubjectEngine
+
+    @classmethod
+    def _discover_plugins(cls) -> Dict[str, str]:
+        """Liste les plugins (un fichier par matière) sans les importer"""
+        if cls._plugins is None:
+            plugins = {}
+            if os.path.isdir(cls.PLUGINS_DIR):
+                for filename in sorted(os.listdir(cls.PLUGINS_DIR)):
+                    name, extension = os.path.splitext(filename)
+                    if extension == ".py" and not name.startswith("_"):
+                        plugins[name] = os.path.join(cls.PLUGINS_DIR, filename)
+            cls._plugins = plugins
+        return cls._plugins
+
+    @staticmethod
+    def _load_plugin(subject: str, plugin_file: str):
+        """Importe un plugin et retourne sa classe ENGINE (None en cas d'erreur)"""
+        try:
+            spec = importlib.util.spec_from_file_location(f"engines.plugins.{subject}", plugin_file)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            engine_class = getattr(module, "ENGINE", None)
+            if not (isinstance(engine_class, type) and issubclass(engine_class, SubjectEngine)):
+                print(f"⚠️ Plugin {subject}: ENGINE doit être une sous-classe de SubjectEngine")
+                return None
+            return engine_class
+
+        except Exception as e:
+            print(f"⚠️ Erreur chargement plugin {subject}: {e}")
+            return None
 
     @staticmethod
     def ensure_completed_field(tasks: List[Dict]) -> List[Dict]:
@@ -0,0 +1,201 @@
+"""
+Corpus pédagogique - Contenu statique des moteurs par matière, stocké sur disque
+Un fichier JSON par matière (data/corpus/<matière>.json), chargé à la première
+consultation, avec un index inversé mot-clé → entrées construit à l'avance.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from config.settings import CORPUS_DIR
+
+
+class KnowledgeCorpus:
+    """
+    Corpus d'une matière : définitions, formules, dates, personnages...
+
+    Structure du fichier :
+    {
+        "subject": "maths",
+        "fields": ["definitions", "formulas", "methodology", "common_mistakes"],
+        "defaults": {"methodology": [...]},          # valeurs de tous les résultats
+        "entries": [
+            {
+                "id": "equation_second_degre",
+                "tiers": [],                         # vide = tous les niveaux
+                "keywords": [["équation"], ["2nd", "second", "discriminant"]],
+                "data": {"definitions": [...], "formulas": [...]}
+            }
+        ],
+        "index": {"équation": [0], "2nd": [0], ...}  # mot-clé → positions d'entrées
+    }
+
+    Une entrée correspond si chaque groupe de `keywords` a au moins un mot
+    présent dans la consigne. Si plusieurs entrées correspondent, la première
+    du fichier l'emporte. La recherche ne dépend que de la longueur de la
+    consigne : un seul passage d'expression régulière trouve les mots-clés,
+    l'index donne directement les entrées candidates.
+    """
+
+    _instances: Dict[str, "KnowledgeCorpus"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, data: Dict, content_hash: str = ""):
+        self.subject = data.get("subject", "")
+        # Empreinte du fichier (sert de clé à l'index de recherche locale)
+        self.content_hash = content_hash
+        self.fields: List[str] = data.get("fields", [])
+        self.defaults: Dict = data.get("defaults", {})
+        self.entries: List[Dict] = data.get("entries", [])
+        self.index: Dict[str, List[int]] = data.get("index") or self.build_index(self.entries)
+        self._pattern: Optional[Pattern] = None
+        self._implied: Dict[str, List[str]] = {}
+
+    @classmethod
+    def load(cls, subject: str) -> "KnowledgeCorpus":
+        """
+        Retourne le corpus d'une matière (lu sur disque au premier appel)
+
+        Un fichier absent ou illisible donne un corpus vide.
+        """
+        with cls._lock:
+            corpus = cls._instances.get(subject)
+            if corpus is None:
+                corpus = cls(*cls._read_file(subject))
+                cls._instances[subject] = corpus
+            return corpus
+
+    @staticmethod
+    def corpus_file(subject: str) -> str:
+        """Chemin du fichier de corpus d'une matière"""
+        return os.path.join(CORPUS_DIR, f"{subject}.json")
+
+    @staticmethod
+    def available_subjects() -> List[str]:
+        """Matières ayant un fichier de corpus"""
+        if not os.path.isdir(CORPUS_DIR):
+            return []
+        return sorted(name[:-5] for name in os.listdir(CORPUS_DIR) if name.endswith(".json"))
+
+    @classmethod
+    def _read_file(cls, subject: str) -> Tuple[Dict, str]:
+        """Lit le fichier de corpus d'une matière : (données, empreinte sha256)"""
+        path = cls.corpus_file(subject)
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    content = f.read()
+                return json.loads(content.decode('utf-8')), hashlib.sha256(content).hexdigest()
+        except Exception as e:
+            print(f"⚠️ Erreur chargement corpus {subject}: {e}")
+        return {"subject": subject}, ""
+
+    # ========================================
+    # INDEX
+    # ========================================
+
+    @staticmethod
+    def build_index(entries: List[Dict]) -> Dict[str, List[int]]:
+        """Construit l'index inversé mot-clé → positions des entrées"""
+        index: Dict[str, List[int]] = {}
+        for position, entry in enumerate(entries):
+            for group in entry.get("keywords", []):
+                for keyword in group:
+                    positions = index.setdefault(keyword.lower(), [])
+                    if not positions or positions[-1] != position:
+                        positions.append(position)
+        return index
+
+    def _get_pattern(self) -> Pattern:
+        """
+        Compile une fois les mots-clés de l'index (voir TitleClassifier._get_rules)
+
+        À chaque position le mot retenu est le plus long : _implied ajoute les
+        mots-clés plus courts qui en sont des préfixes.
+        """
+        if self._pattern is None:
+            from core.title_classifier import TitleClassifier
+
+            keywords = list(self.index)
+            self._implied = {
+                keyword: [other for other in keywords if keyword.startswith(other)]
+                for keyword in keywords
+            }
+            body = TitleClassifier.trie_pattern(keywords) if keywords else r"(?!)"
+            self._pattern = re.compile("(?=(" + body + "))")
+        return self._pattern
+
+    # ========================================
+    # RECHERCHE
+    # ========================================
+
+    def find_entry(self, task: str, tier: str = None) -> Optional[Dict]:
+        """
+        Retourne la première entrée correspondant à la consigne, ou None
+
+        Args:
+            task: Consigne de l'élève
+            tier: Tier éducatif (college/lycee/universite), None = tous
+        """
+        pattern = self._get_pattern()
+
+        found = set()
+        for match in pattern.finditer(task.lower()):
+            found.update(self._implied[match.group(1)])
+
+        candidates = sorted({position for keyword in found for position in self.index[keyword]})
+        for position in candidates:
+            entry = self.entries[position]
+            if tier and entry.get("tiers") and tier not in entry["tiers"]:
+                continue
+            if all(any(keyword in found for keyword in group) for group in entry.get("keywords", [])):
+                return entry
+        return None
+
+    def lookup(self, task: str, tier: str = None) -> Dict:
+        """
+        Construit le résultat de get_static_data pour une consigne
+
+        Returns:
+            {champ: valeur} pour chaque champ du corpus : valeurs par défaut,
+            remplacées par celles de l'entrée trouvée (copies modifiables)
+        """
+        result = {field: [] for field in self.fields}
+        result.update(copy.deepcopy(self.defaults))
+
+        entry = self.find_entry(task, tier)
+        if entry is not None:
+            result.update(copy.deepcopy(entry.get("data", {})))
+        return result
+
+
+def rebuild_indexes(corpus_dir: str = None) -> List[str]:
+    """
+    Reconstruit l'index de chaque fichier de corpus après une modification
+
+    Returns:
+        Les fichiers réécrits
+    """
+    from core.persistence import atomic_write_json
+
+    corpus_dir = corpus_dir or CORPUS_DIR
+    rewritten = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(corpus_dir, name)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data["index"] = KnowledgeCorpus.build_index(data.get("entries", []))
+        atomic_write_json(path, data)
+        rewritten.append(path)
+    return rewritten
+
+
+if __name__ == "__main__":
+    for path in rebuild_indexes():
+        print(f"✅ Index reconstruit : {path}")
@@ -0,0 +1,270 @@
+"""
+Recherche locale - Recherche plein texte BM25 dans le corpus pédagogique
+Répond hors ligne aux questions sur les définitions, formules, dates et
+personnages des moteurs, sans attendre le web.
+"""
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from config.settings import LOCAL_SEARCH_INDEX_FILE
+from core.persistence import atomic_write_json, schedule_save
+from .corpus import KnowledgeCorpus
+
+
+class LocalSearchIndex:
+    """
+    Index BM25 des éléments du corpus (une définition, une formule, une date
+    ou un personnage = un document)
+
+    Le texte d'un document réunit ses champs, le mot désignant son type et
+    les mots-clés de son entrée : "formule du discriminant" préfère la
+    formule à la définition, "révolution française" retrouve aussi les
+    personnages de la Révolution.
+
+    L'index de chaque matière est stocké dans LOCAL_SEARCH_INDEX_FILE sous
+    l'empreinte de son fichier de corpus ; il n'est reconstruit que si le
+    corpus a changé. Structure compacte :
+    {
+        "version": 1,
+        "subjects": {
+            "maths": {
+                "hash": "<sha256 du corpus>",
+                "docs": [["formulas", entrée, position], ...],
+                "lengths": [longueur de chaque document],
+                "postings": {"discriminant": [doc, tf, doc, tf, ...]}
+            }
+        }
+    }
+    """
+
+    # Change quand la tokenisation change : tous les index sont reconstruits
+    VERSION = 1
+
+    # Paramètres BM25 usuels
+    K1 = 1.5
+    B = 0.75
+
+    # Champs indexés : (mot désignant le champ, sous-champs concaténés)
+    FIELDS = {
+        "definitions": ("définition", ["term", "definition"]),
+        "formulas": ("formule", ["name", "formula", "usage"]),
+        "dates": ("date", ["date", "event"]),
+        "figures": ("personnage", ["name", "role", "period"])
+    }
+
+    STOPWORDS = {
+        "le", "la", "les", "un", "une", "des", "de", "du", "et", "ou", "en", "au", "aux",
+        "a", "l", "d", "est", "sur", "par", "pour", "dans", "avec", "qui", "que", "se",
+        "si", "son", "sa", "ses", "ce", "cette", "on", "ne", "pas", "plus", "quel", "quelle"
+    }
+
+    TOKEN = re.compile(r"\w+")
+
+    _instances: Dict[str, "LocalSearchIndex"] = {}
+    _stored: Optional[Dict] = None
+    _lock = threading.Lock()
+
+    def __init__(self, corpus: KnowledgeCorpus, data: Dict):
+        self.corpus = corpus
+        self.docs: List[List] = data["docs"]
+        self.lengths: List[int] = data["lengths"]
+        self.postings: Dict[str, List[int]] = data["postings"]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def for_subject(cls, subject: str) -> "LocalSearchIndex":
+        """
+        Retourne l'index d'un corpus (lu sur disque, reconstruit si le corpus a changé)
+
+        Args:
+            subject: Nom du corpus (SubjectEngine.CORPUS)
+        """
+        rebuilt = False
+        with cls._lock:
+            index = cls._instances.get(subject)
+            if index is None:
+                corpus = KnowledgeCorpus.load(subject)
+                stored = cls._load_stored()
+                data = stored["subjects"].get(subject)
+
+                if data is None or data.get("hash") != corpus.content_hash:
+                    data = cls.build(corpus)
+                    stored["subjects"][subject] = data
+                    rebuilt = True
+
+                index = cls(corpus, data)
+                cls._instances[subject] = index
+
+        if rebuilt:
+            schedule_save(LOCAL_SEARCH_INDEX_FILE, cls._write_stored)
+        return index
+
+    # ========================================
+    # CONSTRUCTION
+    # ========================================
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        Découpe un texte en termes : minuscules sans accents, mots vides
+        retirés, pluriel simple ramené au singulier ("dérivées" → "derivee")
+        """
+        text = unicodedata.normalize("NFKD", text.lower())
+        text = "".join(char for char in text if not unicodedata.combining(char))
+
+        terms = []
+        for token in cls.TOKEN.findall(text):
+            if token in cls.STOPWORDS or (len(token) < 2 and not token.isdigit()):
+                continue
+            if len(token) > 3 and token[-1] in "sx":
+                token = token[:-1]
+            terms.append(token)
+        return terms
+
+    @classmethod
+    def build(cls, corpus: KnowledgeCorpus) -> Dict:
+        """Construit l'index BM25 d'un corpus"""
+        docs = []
+        lengths = []
+        postings: Dict[str, List[int]] = {}
+
+        for entry_position, entry in enumerate(corpus.entries):
+            keywords = " ".join(keyword for group in entry.get("keywords", []) for keyword in group)
+
+            for field, (label, parts) in cls.FIELDS.items():
+                for item_position, item in enumerate(entry.get("data", {}).get(field, [])):
+                    text = " ".join(str(item.get(part, "")) for part in parts)
+                    terms = cls.tokenize(f"{label} {text} {keywords}")
+
+                    counts: Dict[str, int] = {}
+                    for term in terms:
+                        counts[term] = counts.get(term, 0) + 1
+
+                    doc = len(docs)
+                    docs.append([field, entry_position, item_position])
+                    lengths.append(len(terms))
+                    for term, count in counts.items():
+                        postings.setdefault(term, []).extend((doc, count))
+
+        return {
+            "hash": corpus.content_hash,
+            "docs": docs,
+            "lengths": lengths,
+            "postings": postings
+        }
+
+    # ========================================
+    # RECHERCHE
+    # ========================================
+
+    def search(self, query: str, tier: str = None, k: int = 5) -> List[Dict]:
+        """
+        Retourne les k éléments les plus pertinents pour la requête
+
+        Args:
+            query: Requête libre ("formule du discriminant")
+            tier: Tier éducatif (college/lycee/universite), None = tous
+            k: Nombre maximum de résultats
+
+        Returns:
+            [{"field": "formulas", "item": {...}, "topic": id de l'entrée, "score": float}]
+            du plus pertinent au moins pertinent
+        """
+        total = len(self.docs)
+        if not total:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in set(self.tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            frequency = len(postings) // 2
+            idf = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+
+            for position in range(0, len(postings), 2):
+                doc, count = postings[position], postings[position + 1]
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[doc] / self.average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * count * (self.K1 + 1) / (count + norm)
+
+        results = []
+        for doc, score in sorted(scores.items(), key=lambda pair: pair[1], reverse=True):
+            field, entry_position, item_position = self.docs[doc]
+            entry = self.corpus.entries[entry_position]
+            if tier and entry.get("tiers") and tier not in entry["tiers"]:
+                continue
+
+            results.append({
+                "field": field,
+                "item": dict(entry["data"][field][item_position]),
+                "topic": entry.get("id"),
+                "score": round(score, 4)
+            })
+            if len(results) >= k:
+                break
+        return results
+
+    # ========================================
+    # PERSISTANCE
+    # ========================================
+
+    @classmethod
+    def _load_stored(cls) -> Dict:
+        """Charge les index enregistrés au premier accès (verrou déjà pris)"""
+        if cls._stored is None:
+            cls._stored = {"version": cls.VERSION, "subjects": {}}
+            try:
+                if os.path.exists(LOCAL_SEARCH_INDEX_FILE):
+                    with open(LOCAL_SEARCH_INDEX_FILE, 'r', encoding='utf-8') as f:
+                        stored = json.load(f)
+                    if stored.get("version") == cls.VERSION:
+                        cls._stored = stored
+            except Exception as e:
+                print(f"⚠️ Erreur chargement index de recherche locale: {e}")
+        return cls._stored
+
+    @classmethod
+    def _write_stored(cls):
+        """Écrit les index sur disque (JSON compact)"""
+        with cls._lock:
+            data = {"version": cls.VERSION, "subjects": dict(cls._load_stored()["subjects"])}
+        try:
+            atomic_write_json(LOCAL_SEARCH_INDEX_FILE, data, indent=None)
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde index de recherche locale: {e}")
+
+
+def search_local(query: str, subject: str = None, level: str = "premiere", k: int = 5) -> List[Dict]:
+    """
+    Recherche plein texte hors ligne dans le corpus pédagogique
+
+    Args:
+        query: Requête libre
+        subject: Matière (maths, histoire, physique...) ; None = tous les corpus
+        level: Niveau scolaire de l'élève
+        k: Nombre maximum de résultats
+
+    Returns:
+        Résultats triés par score décroissant (voir LocalSearchIndex.search)
+    """
+    from .base import SubjectEngine, SubjectEngineFactory
+
+    if subject is None:
+        corpora = KnowledgeCorpus.available_subjects()
+    else:
+        corpus = getattr(SubjectEngineFactory.get_engine(subject), 'CORPUS', None)
+        corpora = [corpus] if corpus else []
+
+    tier = SubjectEngine.get_level_tier(level)
+    results = []
+    for corpus in corpora:
+        results.extend(LocalSearchIndex.for_subject(corpus).search(query, tier, k))
+
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:k]
@@ -0,0 +1,11 @@
+"""
+Plugins de matières - Moteurs pédagogiques ajoutés sans modifier le code
+
+Un fichier par matière, nommé d'après la matière (ex: philosophie.py), qui
+expose ENGINE = <sous-classe de engines.base.SubjectEngine>. Le fichier
+n'est importé que lorsque SubjectEngineFactory.get_engine() reçoit cette
+matière pour la première fois.
+
+Comme les moteurs intégrés, un plugin peut déclarer ses phases dans PHASES
+et renvoyer apply_template(tasks, level) depuis adapt_tasks.
+"""
@@ -1,8 +1,9 @@
 """
 Client API Anthropic - Gère les appels à l'API Claude
 """
+import json
 import requests
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 
 from config.settings import (
     ANTHROPIC_API_KEY,
@@ -11,8 +12,10 @@ from config.settings import (
     ANTHROPIC_MODEL,
     ANTHROPIC_API_URL,
     API_TIMEOUT,
-    MAX_RETRIES
+    RATE_LIMIT_WAIT
 )
+from external.http_transport import get_session, post_json
+from external.rate_limiter import RateLimiter
 
 
 class AnthropicClient:
@@ -41,7 +44,7 @@ class AnthropicClient:
             prompt: Le message à envoyer
             max_tokens: Nombre maximum de tokens en réponse
             temperature: Créativité (0-1)
-            system_prompt: Instructions système (optionnel)
+            system_prompt: Instructions système, marquées pour le cache de l'API (optionnel)
 
         Returns:
             Le texte de réponse ou None en cas d'erreur
@@ -50,62 +53,141 @@ class AnthropicClient:
             print("⚠️ API Anthropic non configurée")
             return None
 
-        headers = {
+        payload = self._build_payload(prompt, max_tokens, temperature, system_prompt)
+        response = post_json(self.api_url, self._headers(), payload, acquire=self._acquire_token)
+        if response is None:
+            return None
+
+        if response.status_code != 200:
+            print(f"⚠️ Erreur API Anthropic: {response.status_code}")
+            print(f"Détails: {response.text[:200]}")
+            return None
+
+        try:
+            data = response.json()
+        except ValueError:
+            print("⚠️ Réponse API Anthropic illisible")
+            return None
+
+        # Extraire le texte de la réponse
+        content = data.get("content", [])
+        for block in content:
+            if block.get("type") == "text":
+                return block.get("text")
+        return None
+
+    def stream_message(
+        self,
+        prompt: str,
+        max_tokens: int = 3000,
+        temperature: float = 0.7,
+        system_prompt: str = None
+    ) -> Iterator[str]:
+        """
+        Envoie un message en mode streaming (server-sent events)
+
+        Args:
+            prompt: Le message à envoyer
+            max_tokens: Nombre maximum de tokens en réponse
+            temperature: Créativité (0-1)
+            system_prompt: Instructions système, marquées pour le cache de l'API (optionnel)
+
+        Yields:
+            Les fragments de texte au fil de leur arrivée (rien en cas d'erreur)
+
+        Returns:
+            True si le flux est allé jusqu'à « message_stop », False sinon
+        """
+        if not self.is_available():
+            print("⚠️ API Anthropic non configurée")
+            return False
+
+        payload = self._build_payload(prompt, max_tokens, temperature, system_prompt)
+        payload["stream"] = True
+
+        response = post_json(self.api_url, self._headers(), payload, stream=True, acquire=self._acquire_token)
+        if response is None:
+            return False
+
+        with response:
+            if response.status_code != 200:
+                print(f"⚠️ Erreur API Anthropic: {response.status_code}")
+                print(f"Détails: {response.text[:200]}")
+                return False
+
+            try:
+                for line in response.iter_lines(decode_unicode=False):
+                    # Seules les lignes « data: {...} » portent un événement
+                    if not line.startswith(b"data:"):
+                        continue
+
+                    event = json.loads(line[5:])
+                    event_type = event.get("type")
+
+                    if event_type == "content_block_delta":
+                        delta = event.get("delta", {})
+                        if delta.get("type") == "text_delta":
+                            yield delta.get("text", "")
+                    elif event_type == "message_stop":
+                        return True
+                    elif event_type == "error":
+                        print(f"⚠️ Erreur API Anthropic: {event.get('error', {}).get('message')}")
+                        return False
+
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"⚠️ Flux API interrompu: {e}")
+
+        return False
+
+    @staticmethod
+    def _acquire_token() -> bool:
+        """
+        Prend un jeton du quota Anthropic partagé entre processus
+
+        Appelé par post_json avant chaque tentative (une requête HTTP = un
+        jeton), une fois le disjoncteur consulté.
+        """
+        if RateLimiter.shared("anthropic").acquire(RATE_LIMIT_WAIT):
+            return True
+        print("⚠️ Quota API Anthropic atteint - passage en mode hors ligne")
+        return False
+
+    def _headers(self) -> Dict:
+        """En-têtes communs des appels à l'API Messages"""
+        return {
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01"
         }
 
-        messages = [{"role": "user", "content": prompt}]
+    def _build_payload(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: str = None
+    ) -> Dict:
+        """
+        Construit le corps d'une requête à l'API Messages
 
+        Les instructions système portent un marqueur de cache « ephemeral ».
+        L'API ne met en cache qu'au-delà d'un minimum (1024 tokens sur
+        Sonnet) : les instructions de décomposition actuelles (200 à 300
+        tokens) restent en dessous, le marqueur est alors ignoré sans coût.
+        """
         payload = {
             "model": self.model,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "messages": messages
+            "messages": [{"role": "user", "content": prompt}]
         }
 
         if system_prompt:
-            payload["system"] = system_prompt
-
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=API_TIMEOUT
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    # Extraire le texte de la réponse
-                    content = data.get("content", [])
-                    for block in content:
-                        if block.get("type") == "text":
-                            return block.get("text")
-                    return None
-
-                elif response.status_code == 429:
-                    # Rate limit - attendre et réessayer
-                    import time
-                    time.sleep(2 ** attempt)
-                    continue
-
-                else:
-                    print(f"⚠️ Erreur API Anthropic: {response.status_code}")
-                    print(f"Détails: {response.text[:200]}")
-                    return None
-
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout API (tentative {attempt + 1}/{MAX_RETRIES})")
-                continue
-
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Erreur réseau: {e}")
-                return None
+            payload["system"] = [
+                {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+            ]
 
-        return None
+        return payload
 
     def decompose_task(
         self,
@@ -129,11 +211,11 @@ class AnthropicClient:
         # Utiliser le planner pour construire le prompt
         from core.planner import GoblinStyleDecomposer
 
-        prompt = GoblinStyleDecomposer.build_spicy_prompt(
+        prefix, prompt = GoblinStyleDecomposer.build_spicy_prompt_parts(
             task, context, spiciness, max_subtasks, 1.0
         )
 
-        response = self.send_message(prompt, max_tokens=2000, temperature=0.5)
+        response = self.send_message(prompt, max_tokens=2000, temperature=0.5, system_prompt=prefix)
 
         if response:
             # Parser la réponse
@@ -218,7 +300,7 @@ def get_api_key_info(api_key_id: str = None, admin_api_key: str = None) -> Optio
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = get_session().get(url, headers=headers, timeout=API_TIMEOUT)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -0,0 +1,306 @@
+"""
+Transport HTTP partagé - Session persistante (keep-alive) pour tous les clients API
+
+Une seule requests.Session par processus : les connexions TLS vers Anthropic
+et Perplexity sont réutilisées d'un appel à l'autre au lieu d'être rouvertes.
+Politique commune de nouvelles tentatives (Retry-After, attente exponentielle
+avec jitter) et disjoncteur par endpoint : un service en panne est coupé le
+temps d'un refroidissement, les appels passent directement au mode offline.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import (
+    API_TIMEOUT,
+    MAX_RETRIES,
+    HTTP_POOL_SIZE,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_COOLDOWN
+)
+
+logger = logging.getLogger(__name__)
+
+# Réponses temporaires : nouvelle tentative (529 = API Anthropic surchargée)
+RETRY_STATUS = {429, 500, 502, 503, 504, 529}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Retourne la session HTTP partagée (créée au premier appel)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session(HTTP_POOL_SIZE)
+        return _session
+
+
+def configure(pool_size: int = HTTP_POOL_SIZE):
+    """
+    Recrée la session partagée avec une autre taille de pool
+
+    Args:
+        pool_size: Connexions gardées ouvertes par hôte
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _create_session(pool_size)
+
+
+def _create_session(pool_size: int) -> requests.Session:
+    """Crée une session avec un pool de connexions keep-alive"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ========================================
+# DISJONCTEUR
+# ========================================
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un endpoint
+
+    - fermé : les appels passent ; `failure_threshold` appels en échec
+      d'affilée l'ouvrent
+    - ouvert : les appels échouent immédiatement pendant `cooldown` secondes
+    - semi-ouvert : après le refroidissement, un seul appel d'essai passe ;
+      son succès referme le disjoncteur, son échec le rouvre
+    - maintenu ouvert (hold) : le service a demandé d'attendre plus longtemps
+      (Retry-After), aucun essai avant l'heure indiquée
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _shared_instances: Dict[str, "CircuitBreaker"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        # Instant (time.monotonic) à partir duquel un essai peut repartir
+        self._reopen_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, url: str) -> "CircuitBreaker":
+        """
+        Retourne le disjoncteur partagé d'un endpoint
+
+        Args:
+            url: URL appelée (l'endpoint est l'hôte + le chemin)
+        """
+        parts = urlsplit(url)
+        endpoint = f"{parts.scheme}://{parts.netloc}{parts.path}"
+        with cls._shared_lock:
+            instance = cls._shared_instances.get(endpoint)
+            if instance is None:
+                instance = cls()
+                cls._shared_instances[endpoint] = instance
+            return instance
+
+    def allow(self) -> bool:
+        """Indique si un appel peut partir maintenant"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() >= self._reopen_at:
+                # Refroidissement terminé : cet appel sert d'essai
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Un appel a abouti : le disjoncteur se referme"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release(self):
+        """
+        L'appel autorisé n'est finalement pas parti (quota épuisé...) :
+        un essai semi-ouvert est rendu, le suivant pourra être tenté
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        """Un appel a échoué après toutes ses tentatives"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._reopen_at = max(self._reopen_at, time.monotonic() + self.cooldown)
+
+    def hold(self, seconds: float):
+        """
+        Coupe l'endpoint pendant au moins `seconds` secondes
+
+        Args:
+            seconds: Attente demandée par le service (Retry-After)
+        """
+        with self._lock:
+            self.state = self.OPEN
+            self._reopen_at = max(self._reopen_at, time.monotonic() + seconds)
+
+    def retry_in(self) -> float:
+        """Secondes avant le prochain appel d'essai (0 si fermé)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._reopen_at - time.monotonic())
+
+
+# ========================================
+# REQUÊTES
+# ========================================
+
+def retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Attente demandée par l'en-tête Retry-After (secondes ou date HTTP), None si absent"""
+    if response is None:
+        return None
+
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, delay)
+
+
+def retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """
+    Attente avant la tentative suivante
+
+    L'en-tête Retry-After de la réponse est respecté ; sinon attente
+    exponentielle avec jitter complet : uniforme entre 0 et
+    RETRY_BASE_DELAY * 2^attempt. Toujours plafonnée à RETRY_MAX_DELAY
+    (post_json ne réessaie pas quand le Retry-After dépasse ce plafond).
+    """
+    delay = retry_after(response)
+    if delay is not None:
+        return min(delay, RETRY_MAX_DELAY)
+
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def post_json(
+    url: str,
+    headers: Dict,
+    payload: Dict,
+    timeout: float = API_TIMEOUT,
+    max_retries: int = MAX_RETRIES,
+    stream: bool = False,
+    acquire: Callable[[], bool] = None
+) -> Optional[requests.Response]:
+    """
+    Envoie un POST JSON avec la politique commune de timeout et de nouvelles tentatives
+
+    - Disjoncteur de l'endpoint ouvert : abandon immédiat, sans prendre de jeton
+    - Chaque tentative prend son jeton de quota (acquire) ; refusé : abandon
+    - 429, 5xx, timeout ou erreur de connexion : nouvelle tentative après
+      retry_delay() (Retry-After ou attente exponentielle avec jitter)
+    - Retry-After au-delà de RETRY_MAX_DELAY : abandon, et l'endpoint reste
+      coupé jusqu'à l'heure demandée
+    - Autre réponse : renvoyée telle quelle (y compris 4xx)
+
+    Args:
+        url: URL de l'API
+        headers: En-têtes HTTP
+        payload: Corps JSON
+        timeout: Timeout par tentative (secondes)
+        max_retries: Nombre maximum de tentatives
+        stream: Laisser le corps de la réponse en streaming
+        acquire: Prend un jeton de quota avant chaque tentative (False = abandon)
+
+    Returns:
+        La dernière réponse reçue, ou None si aucune réponse n'a été obtenue
+    """
+    breaker = CircuitBreaker.shared(url)
+    if not breaker.allow():
+        logger.warning("Endpoint %s coupé (disjoncteur ouvert, essai dans %.0f s)", url, breaker.retry_in())
+        return None
+
+    session = get_session()
+    response = None
+    # Issue de l'appel pour le disjoncteur : None tant qu'aucune tentative n'est partie
+    succeeded = None
+    # Attente imposée par le service, trop longue pour être faite ici
+    hold_for = None
+
+    try:
+        for attempt in range(max_retries):
+            if attempt:
+                time.sleep(retry_delay(attempt - 1, response))
+
+            if acquire is not None and not acquire():
+                logger.warning("Quota épuisé pour %s (tentative %d/%d abandonnée)", url, attempt + 1, max_retries)
+                break
+
+            if response is not None:
+                response.close()
+                response = None
+
+            succeeded = False
+            try:
+                response = session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                logger.warning("Échec réseau vers %s (tentative %d/%d): %s", url, attempt + 1, max_retries, e)
+                continue
+            except requests.exceptions.RequestException as e:
+                # Erreur non temporaire (URL, en-têtes...) : inutile de réessayer
+                logger.error("Requête vers %s impossible: %s", url, e)
+                return None
+
+            if response.status_code not in RETRY_STATUS:
+                succeeded = True
+                return response
+
+            logger.warning("Réponse %d de %s (tentative %d/%d)", response.status_code, url, attempt + 1, max_retries)
+
+            wait = retry_after(response)
+            if wait is not None and wait > RETRY_MAX_DELAY:
+                logger.warning("%s demande d'attendre %.0f s : endpoint coupé jusque-là", url, wait)
+                hold_for = wait
+                response.close()
+                return None
+
+        return response
+
+    finally:
+        # Toujours conclure, même sur une exception imprévue : un essai
+        # semi-ouvert sans issue bloquerait l'endpoint
+        if succeeded:
+            breaker.record_success()
+        elif succeeded is None:
+            breaker.release()
+        else:
+            breaker.record_failure()
+        if hold_for is not None:
+            breaker.hold(hold_for)
@@ -1,16 +1,17 @@
 """
 Client API Perplexity - Recherche web factuelle avec consentement
 """
-import requests
 from typing import Dict, Optional, List
 
 from config.settings import (
     PERPLEXITY_API_KEY,
     PERPLEXITY_API_URL,
     PERPLEXITY_MODEL,
-    API_TIMEOUT,
-    MAX_RETRIES
+    OFFLINE_SEARCH_RESULTS,
+    RATE_LIMIT_WAIT,
 )
+from external.http_transport import post_json
+from external.rate_limiter import RateLimiter
 
 
 class PerplexityClient:
@@ -70,41 +71,38 @@ class PerplexityClient:
             "temperature": 0.2  # Faible pour des réponses factuelles
         }
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=API_TIMEOUT
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    choices = data.get("choices", [])
-                    if choices:
-                        return choices[0].get("message", {}).get("content")
-                    return None
-
-                elif response.status_code == 429:
-                    import time
-                    time.sleep(2 ** attempt)
-                    continue
-
-                else:
-                    print(f"⚠️ Erreur API Perplexity: {response.status_code}")
-                    return None
-
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout Perplexity (tentative {attempt + 1}/{MAX_RETRIES})")
-                continue
-
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Erreur réseau Perplexity: {e}")
-                return None
+        response = post_json(self.api_url, headers, payload, acquire=self._acquire_token)
+        if response is None:
+            return None
+
+        if response.status_code != 200:
+            print(f"⚠️ Erreur API Perplexity: {response.status_code}")
+            return None
 
+        try:
+            data = response.json()
+        except ValueError:
+            print("⚠️ Réponse API Perplexity illisible")
+            return None
+
+        choices = data.get("choices", [])
+        if choices:
+            return choices[0].get("message", {}).get("content")
         return None
 
+    @staticmethod
+    def _acquire_token() -> bool:
+        """
+        Prend un jeton du quota web partagé entre processus (celui de WebGuard)
+
+        Appelé par post_json avant chaque tentative (une requête HTTP = un
+        jeton), une fois le disjoncteur consulté.
+        """
+        if RateLimiter.shared("perplexity").acquire(RATE_LIMIT_WAIT):
+            return True
+        print("⚠️ Quota de recherches web atteint")
+        return False
+
     def enrich_topic(
         self,
         task: str,
@@ -268,18 +266,35 @@ class PerplexityFallback:
     """
 
     @staticmethod
-    def get_offline_data(subject: str, topic: str = None) -> Dict:
-        """Retourne des données offline basiques"""
-        # Importer les données des moteurs locaux
+    def get_offline_data(subject: str, topic: str = None, level: str = "premiere") -> Dict:
+        """
+        Retourne des données offline : le contenu du moteur correspondant au
+        sujet, complété par la recherche locale BM25 dans le corpus
+        """
         from engines.base import SubjectEngineFactory
+        from engines.local_search import search_local
 
         engine = SubjectEngineFactory.get_engine(subject)
 
+        data = {}
         if hasattr(engine, 'get_static_data'):
+            data = engine.get_static_data(topic or "", level)
+
+        # Sans moteur dédié, la recherche porte sur tout le corpus
+        found = 0
+        if topic:
+            search_subject = subject if getattr(engine, 'CORPUS', None) else None
+            for hit in search_local(topic, search_subject, level, OFFLINE_SEARCH_RESULTS):
+                items = data.setdefault(hit["field"], [])
+                if hit["item"] not in items:
+                    items.append(hit["item"])
+                    found += 1
+
+        if hasattr(engine, 'get_static_data') or found:
             return {
                 "success": True,
                 "source": "offline",
-                **engine.get_static_data(topic or "", "premiere")
+                **data
             }
 
         return {
@@ -0,0 +1,225 @@
+"""
+Limiteur de débit - Seaux à jetons partagés entre threads et processus
+Empêche les décompositions parallèles, et plusieurs instances de
+l'application, de dépasser les quotas des API.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config.settings import (
+    RATE_LIMIT_FILE,
+    API_RATE_LIMIT_PER_MINUTE,
+    API_RATE_LIMIT_PER_DAY,
+    API_RATE_LIMIT_BURST,
+    WEB_RATE_LIMIT_PER_MINUTE,
+    WEB_DAILY_LIMIT,
+    WEB_RATE_LIMIT_BURST
+)
+from core.persistence import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Seau à jetons d'une API : `per_minute` jetons par minute, au plus
+    `burst` d'avance, et au plus `per_day` jetons par jour
+
+    L'état du seau est dans un fichier commun à tous les processus, lu et
+    écrit sous verrou exclusif (fcntl.flock, msvcrt.locking sous Windows) :
+    des workers lancés en parallèle se partagent le même budget.
+
+    Structure du fichier :
+    {
+        "anthropic": {"tokens": 4.2, "updated": <horodatage>, "day": "2024-01-15", "used_today": 12}
+    }
+    """
+
+    # API -> (jetons par minute, jetons par jour, jetons d'avance)
+    BUDGETS = {
+        "anthropic": (API_RATE_LIMIT_PER_MINUTE, API_RATE_LIMIT_PER_DAY, API_RATE_LIMIT_BURST),
+        "perplexity": (WEB_RATE_LIMIT_PER_MINUTE, WEB_DAILY_LIMIT, WEB_RATE_LIMIT_BURST)
+    }
+
+    _shared_instances: Dict[str, "RateLimiter"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: int,
+        per_day: int = None,
+        burst: int = None,
+        state_file: str = None
+    ):
+        """
+        Args:
+            name: Nom du seau dans le fichier d'état
+            per_minute: Jetons rendus par minute
+            per_day: Jetons par jour (None = sans limite journalière)
+            burst: Jetons accumulables d'avance (défaut: un dixième de per_minute)
+            state_file: Fichier d'état partagé (défaut: RATE_LIMIT_FILE)
+        """
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.per_day = per_day
+        self.burst = max(1, burst if burst is not None else per_minute // 10)
+        self.state_file = state_file or RATE_LIMIT_FILE
+        self.lock_file = self.state_file + ".lock"
+        # Évite que les threads du processus se disputent le verrou de fichier
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, name: str = "anthropic") -> "RateLimiter":
+        """
+        Retourne le limiteur partagé d'une API
+
+        Args:
+            name: Nom de l'API (une clé de BUDGETS)
+        """
+        with cls._shared_lock:
+            instance = cls._shared_instances.get(name)
+            if instance is None:
+                per_minute, per_day, burst = cls.BUDGETS.get(name, cls.BUDGETS["anthropic"])
+                instance = cls(name, per_minute, per_day, burst)
+                cls._shared_instances[name] = instance
+            return instance
+
+    # ========================================
+    # JETONS
+    # ========================================
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Prend un jeton, en attendant si nécessaire
+
+        Args:
+            timeout: Attente maximale en secondes (None = sans limite)
+
+        Returns:
+            True si un jeton a été obtenu, False si le délai est dépassé ou
+            le budget du jour épuisé (inutile d'attendre)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._transaction() as state:
+                if self.per_day is not None and state["used_today"] >= self.per_day:
+                    return False
+
+                if state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    state["used_today"] += 1
+                    return True
+
+                wait = (1 - state["tokens"]) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            time.sleep(wait)
+
+    def used_today(self) -> int:
+        """Jetons pris aujourd'hui, tous processus confondus"""
+        with self._transaction() as state:
+            return state["used_today"]
+
+    def remaining_today(self) -> Optional[int]:
+        """Jetons encore disponibles aujourd'hui (None = sans limite journalière)"""
+        if self.per_day is None:
+            return None
+        return max(0, self.per_day - self.used_today())
+
+    # ========================================
+    # ÉTAT PARTAGÉ
+    # ========================================
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Dict]:
+        """
+        Donne l'état du seau, à jour, sous verrou exclusif
+
+        L'état est rechargé du fichier et rempli selon le temps écoulé. Il
+        n'est réécrit que si un jeton a été pris ou si le jour a changé : le
+        remplissage se recalcule à l'identique à la lecture suivante.
+        """
+        with self._lock, self._file_lock():
+            states = self._read_states()
+            state, before = self._refill(states.get(self.name))
+            yield state
+
+            if state["used_today"] != before.get("used_today") or state["day"] != before.get("day"):
+                states[self.name] = state
+                try:
+                    atomic_write_json(self.state_file, states)
+                except Exception as e:
+                    logger.warning("Erreur sauvegarde limiteur de débit: %s", e)
+
+    def _refill(self, state: Dict) -> Tuple[Dict, Dict]:
+        """Retourne (état rempli et remis à zéro chaque jour, état lu)"""
+        now = time.time()
+        today = datetime.now().strftime("%Y-%m-%d")
+        before = dict(state) if state else {}
+
+        state = dict(before) or {"tokens": float(self.burst), "updated": now, "day": today, "used_today": 0}
+        # Horloge reculée : pas de jetons négatifs
+        elapsed = max(0.0, now - state.get("updated", now))
+        state["tokens"] = min(self.burst, state.get("tokens", self.burst) + elapsed * self.rate)
+        state["updated"] = now
+
+        if state.get("day") != today:
+            state["day"] = today
+            state["used_today"] = 0
+        state.setdefault("used_today", 0)
+        return state, before
+
+    def _read_states(self) -> Dict:
+        """Lit l'état de tous les seaux (verrou déjà pris)"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning("Erreur chargement limiteur de débit: %s", e)
+        return {}
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Verrou exclusif entre processus sur le fichier .lock"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_file)), exist_ok=True)
+
+        with open(self.lock_file, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK abandonne après 10 s : on réessaie
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -6,7 +6,9 @@ import os
 from typing import Dict, Optional
 from datetime import datetime
 
-from config.settings import DATA_DIR
+from config.settings import DATA_DIR, WEB_DAILY_LIMIT
+from core.persistence import atomic_write_json, schedule_save
+from external.rate_limiter import RateLimiter
 
 
 class WebGuard:
@@ -23,8 +25,12 @@ class WebGuard:
     def __init__(self, user_profile=None):
         """
         Args:
-            user_profile: Instance de UserPersonalization (optionnel)
+            user_profile: Instance de UserPersonalization (défaut: instance partagée)
         """
+        if user_profile is None:
+            from core.personalization import UserPersonalization
+            user_profile = UserPersonalization.shared()
+
         self.user_profile = user_profile
         self.usage_log_file = os.path.join(DATA_DIR, "web_usage_log.json")
         self.usage_log = self._load_usage_log()
@@ -46,11 +52,13 @@ class WebGuard:
         }
 
     def _save_usage_log(self):
-        """Sauvegarde le log d'utilisation"""
+        """Sauvegarde le log d'utilisation (différée si une transaction est ouverte)"""
+        schedule_save(self.usage_log_file, self._write_usage_log)
+
+    def _write_usage_log(self):
+        """Écrit le log d'utilisation sur disque"""
         try:
-            os.makedirs(os.path.dirname(self.usage_log_file), exist_ok=True)
-            with open(self.usage_log_file, 'w', encoding='utf-8') as f:
-                json.dump(self.usage_log, f, indent=2, ensure_ascii=False)
+            atomic_write_json(self.usage_log_file, self.usage_log)
         except Exception as e:
             print(f"⚠️ Erreur sauvegarde log web: {e}")
 
@@ -187,11 +195,16 @@ class WebGuard:
     # ========================================
 
     def get_usage_stats(self) -> Dict:
-        """Retourne les statistiques d'utilisation web"""
+        """
+        Retourne les statistiques d'utilisation web
+
+        requests_today vient du limiteur de débit partagé entre processus,
+        comme check_rate_limit ; le reste vient du log de ce processus.
+        """
         return {
             "web_enabled": self.can_use_web(),
             "total_requests": self.usage_log.get("total_requests", 0),
-            "requests_today": self.usage_log.get("requests_today", 0),
+            "requests_today": RateLimiter.shared("perplexity").used_today(),
             "last_request_date": self.usage_log.get("last_request_date"),
             "history_count": len(self.usage_log.get("history", []))
         }
@@ -205,29 +218,21 @@ class WebGuard:
     # CONTRÔLE DE RATE
     # ========================================
 
-    def check_rate_limit(self, max_daily: int = 50) -> bool:
+    def check_rate_limit(self, max_daily: int = WEB_DAILY_LIMIT) -> bool:
         """
         Vérifie si la limite de requêtes n'est pas atteinte
 
+        Le compteur est celui du limiteur de débit web, partagé entre tous
+        les processus (et non le log chargé au démarrage de celui-ci).
+
         Args:
             max_daily: Limite de requêtes par jour
 
         Returns:
             True si on peut encore faire des requêtes
         """
-        today = datetime.now().strftime("%Y-%m-%d")
+        return self.get_remaining_requests(max_daily) > 0
 
-        # Réinitialiser si nouveau jour
-        if self.usage_log.get("last_request_date") != today:
-            return True
-
-        return self.usage_log.get("requests_today", 0) < max_daily
-
-    def get_remaining_requests(self, max_daily: int = 50) -> int:
+    def get_remaining_requests(self, max_daily: int = WEB_DAILY_LIMIT) -> int:
         """Retourne le nombre de requêtes restantes pour aujourd'hui"""
-        today = datetime.now().strftime("%Y-%m-%d")
-
-        if self.usage_log.get("last_request_date") != today:
-            return max_daily
-
-        return max(0, max_daily - self.usage_log.get("requests_today", 0))
+        return max(0, max_daily - RateLimiter.shared("perplexity").used_today())
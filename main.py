@@ -11,6 +11,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from ui.responsive_ui import ResponsiveUI, TDAHAssistant
+from core.persistence import transaction
 
 
 def main():
@@ -75,8 +76,9 @@ def run_cli_mode():
         print()
         print("Analyse en cours...")
 
-        # Analyser et décomposer
-        result = assistant.process_task(task)
+        # Analyser et décomposer (une seule écriture par fichier modifié)
+        with transaction():
+            result = assistant.process_task(task)
 
         if result.get("success"):
             print()